@@ -18,22 +18,72 @@ import signal
 import sys
 import time
 import os
-import csv
+import queue
+import gzip
 import json
 import sqlite3
 import logging
-import subprocess
+import math
+import operator
 import aiohttp
-from collections import deque
+from array import array
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from enum import Enum
 
-from witmotion_device_stable import DeviceModel, DeviceState
+from witmotion_device_stable import DeviceModel, DeviceState, FRAME_FIELDS
 
 # Global config will be loaded from JSON
 CONFIG = {}
 
+# Event row insert; one constant string so sqlite3's statement cache reuses the
+# prepared statement. Explicit column names avoid schema mismatch issues
+INSERT_EVENT_SQL = (
+    "INSERT INTO events "
+    "(event_id, start_time, end_time, duration, trigger_device, "
+    "max_acceleration, num_devices, data_path, created_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+# Parsed config files keyed by (abspath, mtime_ns); entries are read-only
+_CONFIG_CACHE = {}
+
+# Event CSV columns (after the timestamp column)
+CSV_FIELDS = ('AccX', 'AccY', 'AccZ', 'AngX', 'AngY', 'AngZ', 'AsX', 'AsY', 'AsZ')
+CSV_HEADER = 'timestamp,' + ','.join(CSV_FIELDS) + '\r\n'  # csv module dialect line ending
+# Samples are kept at full precision; values are rounded to 3 decimals on output
+CSV_DECIMALS = (3,) * len(CSV_FIELDS)
+
+# One immutable IMU sample (fields in CSV column order); shared without copying
+IMUSample = namedtuple('IMUSample', CSV_FIELDS)
+# Device frame tuple -> fields in CSV order in one C-level call
+_get_sample_fields = operator.itemgetter(*[FRAME_FIELDS.index(name) for name in CSV_FIELDS])
+
+class _TimestampFormatter:
+    """
+    Formats epoch seconds as '%Y-%m-%d %H:%M:%S.%f' (same output as
+    datetime.fromtimestamp(ts).strftime), calling strftime once per whole second
+    """
+    
+    def __init__(self):
+        self._sec = None
+        self._prefix = ''
+    
+    def __call__(self, ts):
+        sec = math.floor(ts)
+        # fromtimestamp rounds the fraction half-even to microseconds
+        usec = round((ts - sec) * 1e6)
+        if usec >= 1000000:
+            sec += 1
+            usec -= 1000000
+        if sec != self._sec:
+            self._sec = sec
+            self._prefix = datetime.fromtimestamp(sec).strftime('%Y-%m-%d %H:%M:%S.')
+        return f"{self._prefix}{usec:06d}"
+
+
 # Configure logging
 def setup_logging(log_file):
     """Setup logging with file and console handlers"""
@@ -49,6 +99,60 @@ def setup_logging(log_file):
 logger = logging.getLogger(__name__)
 
 
+class SampleRingBuffer:
+    """
+    Fixed-capacity circular buffer for IMU samples
+    Slots are pre-allocated once; writes overwrite the oldest slot in place
+    Timestamps are kept in a flat float array (column) next to the sample slots
+    """
+    
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._ts = array('d', bytes(8 * capacity))
+        self._samples = [None] * capacity
+        self._head = 0  # Next slot to write
+        self._count = 0
+    
+    def __len__(self):
+        return self._count
+    
+    def append(self, timestamp, sample):
+        """Write one sample, overwriting the oldest slot when full"""
+        head = self._head
+        self._ts[head] = timestamp
+        self._samples[head] = sample
+        self._head = (head + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+    
+    def clear(self):
+        """Drop all samples (slots stay allocated)"""
+        self._samples = [None] * self.capacity
+        self._head = 0
+        self._count = 0
+    
+    def snapshot(self, limit=None):
+        """
+        Return samples in chronological order as a list of (timestamp, sample)
+        
+        Args:
+            limit: only copy the most recent `limit` samples (all if None)
+        """
+        count = self._count if limit is None else min(limit, self._count)
+        if count <= 0:
+            return []
+        
+        # At most two contiguous slices of the ring, zipped at C level
+        head = self._head
+        start = (head - count) % self.capacity
+        ts = self._ts
+        samples = self._samples
+        if start < head:
+            return list(zip(ts[start:head], samples[start:head]))
+        return (list(zip(ts[start:], samples[start:])) +
+                list(zip(ts[:head], samples[:head])))
+
+
 class IMUManager:
     """
     Single IMU manager - independent state machine
@@ -75,43 +179,45 @@ class IMUManager:
         # Device instance
         self.device = None
         
-        # P0: Connection mutex lock (prevent race conditions)
-        self._connection_lock = asyncio.Lock()
+        # P0: Connection state (prevent race conditions)
+        # 'idle' -> 'connecting' -> 'ready' | 'idle'; only one connect flow at a time
+        self._conn_state = 'idle'
+        self._conn_idle = asyncio.Event()  # Set whenever no connect flow is in flight
+        self._conn_idle.set()
         
         # State
         self.is_ready = False
         self.last_data_time = 0
         self.connection_attempts = 0
         
-        # Health monitoring
-        self.last_health_check = 0
-        self.reconnecting = False  # Prevent concurrent reconnections
+        # Health monitoring (deadline of the next due check)
+        self.next_health_check = 0
+        self.reconnecting = False  # Reported in status uploads
         
-        # Circular buffer
-        self.buffer = deque(maxlen=250)  # 5 seconds @ 50Hz
-        self.current_data = {}
+        # Circular buffer (pre-allocated, fixed capacity)
+        self.buffer = SampleRingBuffer(250)  # 5 seconds @ 50Hz
+        self.current_data = None  # Latest IMUSample
         
         logger.info(f"[IMU-{self.number}] Manager initialized")
-        print(f"[IMU-{self.number}] Manager initialized")
     
     async def connect(self, retry_count=0):
         """
         Connect device (with retry and failure counting)
-        P0: Use lock protection to prevent concurrent connections
+        P0: Connection state guard prevents concurrent connections
         Returns: success (bool)
         """
-        # P0: Check lock state, skip if already occupied
-        if self._connection_lock.locked():
+        # P0: Skip if another connection flow owns the device
+        if self._conn_state == 'connecting':
             logger.warning(f"[IMU-{self.number}] Connection already in progress, skipping")
             return False
         
-        async with self._connection_lock:  # P0: Mutual exclusion protection
+        self._begin_connect()
+        try:
             if retry_count == 0:
                 self.connection_attempts += 1
             
             if self.connection_attempts > self.max_retries:
                 logger.error(f"[IMU-{self.number}] Max retries reached")
-                print(f"[IMU-{self.number}] Max retries reached")
                 return False
             
             # Create device instance
@@ -125,11 +231,9 @@ class IMUManager:
                 self.connection_attempts = 0  # Reset counter
                 self.device.reset_failure()  # Reset device failure count
                 logger.info(f"[IMU-{self.number}] Connected successfully")
-                print(f"[IMU-{self.number}] Connected successfully")
                 return True
             else:
                 logger.error(f"[IMU-{self.number}] Connection failed: {error_msg}")
-                print(f"[IMU-{self.number}] Connection failed: {error_msg}")
                 
                 # Increment device failure count
                 if self.device:
@@ -139,44 +243,63 @@ class IMUManager:
                 
                 await self.disconnect()
                 return False
+        finally:
+            self._finish_connect()
+    
+    def _begin_connect(self):
+        """Enter the 'connecting' state (caller must release it via _finish_connect)"""
+        self._conn_state = 'connecting'
+        self._conn_idle.clear()
+    
+    def _finish_connect(self):
+        """Leave the 'connecting' state according to the outcome"""
+        self._conn_state = 'ready' if self.is_ready else 'idle'
+        self._conn_idle.set()
+    
+    async def wait_connect_idle(self):
+        """Wait until no connect/reconnect flow is in flight"""
+        await self._conn_idle.wait()
     
     async def disconnect(self):
         """Disconnect (complete cleanup)"""
         self.is_ready = False
+        if self._conn_state == 'ready':
+            self._conn_state = 'idle'
         
         if self.device:
             await self.device.disconnect()
             self.device = None
         
-        print(f"[IMU-{self.number}] Disconnected")
+        logger.info(f"[IMU-{self.number}] Disconnected")
     
     def _device_callback(self, device_model):
         """Device data callback"""
         current_time = time.time()
         self.last_data_time = current_time
         
-        data = device_model.deviceData.copy()
+        # Immutable sample: buffer, detector and status can all hold the same object
+        data = IMUSample._make(_get_sample_fields(device_model.frame))
         self.current_data = data
         
         # Add to buffer
-        self.buffer.append((current_time, data))
+        self.buffer.append(current_time, data)
         
         # Callback to detector
         if self.data_callback:
             self.data_callback(self.number, current_time, data)
     
-    def get_buffer_data(self):
-        """Get buffer data"""
-        return list(self.buffer)
+    def get_buffer_data(self, limit=None):
+        """Get buffer data (optionally only the most recent `limit` samples)"""
+        return self.buffer.snapshot(limit)
     
     def clear_buffer(self):
         """Clear buffer"""
         self.buffer.clear()
     
-    async def check_and_reconnect(self):
+    async def check_and_reconnect(self, current_time=None):
         """
         Health check + automatic reconnection
-        P0: Use lock protection to prevent competition with main connection flow
+        P0: Connection state guard prevents competition with main connection flow
         
         Detection conditions:
         - Device in READY state
@@ -187,27 +310,25 @@ class IMUManager:
         - Serial execution, non-blocking for other IMUs
         - No infinite retry after failure
         
+        Args:
+            current_time: caller's monotonic tick time (read from the clock if omitted)
+        
         Returns: reconnected (bool)
         """
-        current_time = time.time()
-        
-        # Prevent concurrent reconnections
-        if self.reconnecting:
+        # Only READY devices are checked; also skips while any connect/reconnect runs
+        if self._conn_state != 'ready':
             return False
         
-        # P0: Check connection lock, skip if other connection operations
-        if self._connection_lock.locked():
-            logger.debug(f"[IMU-{self.number}] Connection lock busy, skipping health check")
-            return False
+        if current_time is None:
+            current_time = time.monotonic()
         
-        # Health check interval
-        if current_time - self.last_health_check < self.HEALTH_CHECK_INTERVAL:
+        # Not due yet
+        if current_time < self.next_health_check:
             return False
         
-        self.last_health_check = current_time
+        self.next_health_check = current_time + self.HEALTH_CHECK_INTERVAL
         
-        # Not READY state, don't check
-        if not self.is_ready or not self.device:
+        if not self.device:
             return False
         
         # Perform health check
@@ -227,51 +348,47 @@ class IMUManager:
         logger.warning(
             f"[IMU-{self.number}] RECONNECT triggered: {final_reason}"
         )
-        print(f"[IMU-{self.number}] Detected problem, reconnecting...")
         
         self.reconnecting = True
+        self._begin_connect()  # P0: Claim the device for the reconnection flow
         
         try:
-            # P0: Use lock to protect reconnection flow
-            async with self._connection_lock:
-                # Step 1: Complete disconnect
-                logger.info(f"[IMU-{self.number}] Step 1: Disconnecting...")
+            # Step 1: Complete disconnect
+            logger.info(f"[IMU-{self.number}] Step 1: Disconnecting...")
+            await self.disconnect()
+            
+            # Step 2: Delay (let BLE stack stabilize)
+            await asyncio.sleep(2.0)
+            
+            # Step 3: Reconnect (state already claimed, don't go through connect())
+            logger.info(f"[IMU-{self.number}] Step 2: Reconnecting...")
+            
+            if self.connection_attempts > self.max_retries:
+                logger.error(f"[IMU-{self.number}] Max retries reached")
+                return False
+            
+            self.device = DeviceModel(self.name, self.mac, self._device_callback, self.config)
+            success, error_msg = await self.device.connect()
+            
+            if success:
+                self.is_ready = True
+                self.connection_attempts = 0
+                self.device.reset_failure()
+                logger.info(f"[IMU-{self.number}] Reconnection successful")
+                return True
+            else:
+                logger.error(f"[IMU-{self.number}] Reconnection failed: {error_msg}")
+                if self.device:
+                    self.device.increment_failure()
                 await self.disconnect()
-                
-                # Step 2: Delay (let BLE stack stabilize)
-                await asyncio.sleep(2.0)
-                
-                # Step 3: Reconnect (lock already held, won't acquire again internally)
-                logger.info(f"[IMU-{self.number}] Step 2: Reconnecting...")
-                
-                # Temporarily call internal connection logic without acquiring lock again
-                if self.connection_attempts > self.max_retries:
-                    logger.error(f"[IMU-{self.number}] Max retries reached")
-                    return False
-                
-                self.device = DeviceModel(self.name, self.mac, self._device_callback, self.config)
-                success, error_msg = await self.device.connect()
-                
-                if success:
-                    self.is_ready = True
-                    self.connection_attempts = 0
-                    self.device.reset_failure()
-                    logger.info(f"[IMU-{self.number}] Reconnection successful")
-                    print(f"[IMU-{self.number}] Reconnected")
-                    return True
-                else:
-                    logger.error(f"[IMU-{self.number}] Reconnection failed: {error_msg}")
-                    print(f"[IMU-{self.number}] Reconnection failed")
-                    if self.device:
-                        self.device.increment_failure()
-                    await self.disconnect()
-                    return False
-                
+                return False
+            
         except Exception as e:
             logger.error(f"[IMU-{self.number}] Reconnection error: {e}")
             return False
         finally:
             self.reconnecting = False
+            self._finish_connect()
     
     def should_trigger_os_cleanup(self):
         """
@@ -298,7 +415,8 @@ class IMUManager:
             'reconnecting': self.reconnecting,
             'connection_attempts': self.connection_attempts,
             'buffer_size': len(self.buffer),
-            'current_data': self.current_data.copy() if self.current_data else {}
+            'current_data': (dict(zip(CSV_FIELDS, map(round, self.current_data, CSV_DECIMALS)))
+                             if self.current_data else {})
         }
         
         # Add device health stats if available
@@ -327,14 +445,33 @@ class HealthUploader:
         self.timeout = upload_config.get('timeout', 5.0)
         self.retry_on_failure = upload_config.get('retry_on_failure', False)
         
+        # Request constants built once, not per upload
         self.url = f"http://{self.host}:{self.port}{self.endpoint}"
-        self.last_upload_time = 0
+        self._client_timeout = aiohttp.ClientTimeout(total=self.timeout)
+        
+        # Persistent session (keep-alive), created lazily inside the event loop
+        self._session = None
+        
+        self.last_upload_time = float('-inf')  # Monotonic
         self.upload_count = 0
         self.upload_failures = 0
         
         if self.enabled:
             logger.info(f"Health uploader enabled: {self.url}")
-            print(f"Health uploader enabled: {self.url}")
+    
+    def _get_session(self):
+        """Get the shared client session (reuses the TCP connection across uploads)"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=4, keepalive_timeout=2 * self.interval)
+            )
+        return self._session
+    
+    async def close(self):
+        """Close the shared session (idempotent)"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
     
     async def upload_health_data(self, imu_managers, system_stats):
         """
@@ -349,7 +486,7 @@ class HealthUploader:
         if not self.enabled:
             return True
         
-        current_time = time.time()
+        current_time = time.monotonic()
         
         # Check interval
         if current_time - self.last_upload_time < self.interval:
@@ -367,21 +504,20 @@ class HealthUploader:
                 health_data['imus'].append(imu.get_status_dict())
             
             # Upload with timeout
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.url,
-                    json=health_data,
-                    timeout=aiohttp.ClientTimeout(total=self.timeout)
-                ) as response:
-                    if response.status == 200:
-                        self.upload_count += 1
-                        self.last_upload_time = current_time
-                        logger.debug(f"Health data uploaded successfully (count: {self.upload_count})")
-                        return True
-                    else:
-                        logger.warning(f"Upload failed with status {response.status}")
-                        self.upload_failures += 1
-                        return False
+            async with self._get_session().post(
+                self.url,
+                json=health_data,
+                timeout=self._client_timeout
+            ) as response:
+                if response.status == 200:
+                    self.upload_count += 1
+                    self.last_upload_time = current_time
+                    logger.debug("Health data uploaded successfully (count: %d)", self.upload_count)
+                    return True
+                else:
+                    logger.warning(f"Upload failed with status {response.status}")
+                    self.upload_failures += 1
+                    return False
         
         except asyncio.TimeoutError:
             logger.warning("Health upload timeout")
@@ -389,7 +525,7 @@ class HealthUploader:
             return False
         except Exception as e:
             # Do not log at ERROR level to avoid noise
-            logger.debug(f"Health upload error: {e}")
+            logger.debug("Health upload error: %s", e)
             self.upload_failures += 1
             return False
 
@@ -414,30 +550,34 @@ class TrainDetector:
         output_config = self.config.get('output', {})
         self.output_dir = Path(output_config.get('directory', 'train_events'))
         self.output_dir.mkdir(exist_ok=True)
+        # Optional gzip (level 1) for event CSVs: fewer bytes written to the SD card
+        self.compress_csv = output_config.get('compress_csv', False)
         
         log_file = output_config.get('log_file', 'train_detector.log')
         setup_logging(log_file)
         
         # IMU managers
         self.imus = {}  # number -> IMUManager
+        self._sorted_imu_keys = []  # Device numbers in order; the set is fixed once start() builds it
         
         # P0: Global throttling (prevent reconnection storm)
         reconnect_config = self.config.get('reconnection', {})
-        self.last_reconnect_time = 0
+        self.last_reconnect_time = float('-inf')  # Monotonic
         self.reconnect_global_cooldown = reconnect_config.get('global_cooldown', 5.0)
         
         # OS cleanup state tracking
-        self.os_cleanup_history = {}  # mac -> last_cleanup_time
+        self.os_cleanup_history = {}  # mac -> last_cleanup_time (monotonic)
         self.OS_CLEANUP_COOLDOWN = reconnect_config.get('os_cleanup_cooldown', 600)
         
         # P0: Global OS cleanup throttling
-        self.last_os_cleanup_global = 0
+        self.last_os_cleanup_global = float('-inf')  # Monotonic
         self.os_cleanup_global_cooldown = reconnect_config.get('os_cleanup_global_cooldown', 300)
         self.ble_operations_paused = False  # BLE operations pause flag (during OS cleanup)
         
         # Detection parameters from config
         detection_config = self.config.get('detection', {})
         self.threshold = detection_config.get('threshold', 2.0)
+        self._threshold_sq = self.threshold * self.threshold  # Compare squared magnitude per sample
         self.min_duration = detection_config.get('min_duration', 1.0)
         self.post_trigger_duration = detection_config.get('post_trigger_duration', 5.0)
         
@@ -448,6 +588,11 @@ class TrainDetector:
         self.trigger_device = None
         self.event_data = {}
         self.event_id = None
+        self.event_peak_sq = 0.0  # Peak squared |acc| of the current event, tracked while recording
+        
+        # Event directory names already used (scanned once; uniqueness checked in memory)
+        with os.scandir(self.output_dir) as entries:
+            self._event_dirs = {e.name for e in entries if e.name.startswith('event_')}
         
         # Database
         db_name = output_config.get('db_name', 'events.db')
@@ -469,6 +614,18 @@ class TrainDetector:
         # NEW: Save operation lock (prevent race conditions)
         self._save_lock = asyncio.Lock()
         
+        # Dedicated worker for event file I/O (keeps the default executor free)
+        self._save_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='event-save')
+        # Per-device CSV writes of one event run in parallel (file I/O and zlib release the GIL)
+        self._csv_write_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='csv-write')
+        # Event rows are handed to a separate DB writer so SQLite stalls never hold up saves
+        self._db_queue = queue.SimpleQueue()
+        self._db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='event-db')
+        # Cached free space of output_dir: (monotonic check time, MB)
+        self._disk_free = (float('-inf'), 0.0)
+        # print_status cache: (last_event_time, formatted string)
+        self._last_event_str = (None, '')
+        
         # Signal handlers
         self._setup_signal_handlers()
         
@@ -484,15 +641,23 @@ class TrainDetector:
         print("=" * 60)
     
     def _load_config_file(self, config_file):
-        """Load configuration from JSON file"""
-        if not os.path.exists(config_file):
+        """Load configuration from JSON file (cached until the file changes)"""
+        try:
+            st = os.stat(config_file)
+        except OSError:
             logger.error(f"Config file not found: {config_file}")
             print(f"Config file not found: {config_file}")
             sys.exit(1)
         
+        key = (os.path.abspath(config_file), st.st_mtime_ns)
+        config = _CONFIG_CACHE.get(key)
+        if config is not None:
+            return config
+        
         try:
-            with open(config_file, 'r') as f:
-                config = json.load(f)
+            with open(config_file, 'rb') as f:
+                config = json.loads(f.read())
+                _CONFIG_CACHE[key] = config
                 logger.info(f"Configuration loaded from {config_file}")
                 return config
         except Exception as e:
@@ -510,29 +675,41 @@ class TrainDetector:
         signal.signal(signal.SIGTERM, signal_handler)
     
     def _init_database(self):
-        """Initialize database with migration support"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        """
+        Initialize database with migration support
+        Opens the long-lived connection used for all event writes
+        """
+        # One connection for the process lifetime; writes come from the save worker thread
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._db_conn = conn
+        
+        # WAL + NORMAL sync: one fsync per checkpoint instead of per commit
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-16384")
+        # External readers (sqlite3 CLI, scripts) may hold the DB briefly; wait instead of failing
+        conn.execute("PRAGMA busy_timeout=5000")
         
-        # Check if table exists
-        cursor.execute("""
-            SELECT name FROM sqlite_master 
-            WHERE type='table' AND name='events'
-        """)
+        cursor = conn.cursor()
         
-        table_exists = cursor.fetchone() is not None
+        # One schema query: table_info returns no rows if the table does not exist
+        cursor.execute("PRAGMA table_info(events)")
+        columns = cursor.fetchall()
+        table_exists = bool(columns)
         
         if table_exists:
             # Check column count to detect schema mismatch
-            cursor.execute("PRAGMA table_info(events)")
-            columns = cursor.fetchall()
-            
             if len(columns) != 9:
                 logger.warning(f"Database schema mismatch: found {len(columns)} columns, expected 9")
                 logger.warning("Backing up old table and creating new one")
                 
-                # Backup old table
+                # Backup old table (plus a full-file snapshot before touching the schema)
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+                try:
+                    self._snapshot_db(self.db_path.with_name(f"{self.db_path.name}.bak_{timestamp}"))
+                except sqlite3.Error as e:
+                    logger.warning(f"DB snapshot before migration failed: {e}")
                 try:
                     cursor.execute(f"ALTER TABLE events RENAME TO events_backup_{timestamp}")
                     logger.info(f"Old table renamed to events_backup_{timestamp}")
@@ -540,7 +717,6 @@ class TrainDetector:
                 except sqlite3.Error as e:
                     logger.error(f"Failed to backup old table: {e}")
                     print(f"ERROR: Database schema mismatch. Please delete {self.db_path} and restart.")
-                    conn.close()
                     return
         
         if not table_exists:
@@ -560,7 +736,18 @@ class TrainDetector:
             logger.info("Events table created successfully")
         
         conn.commit()
-        conn.close()
+    
+    def _snapshot_db(self, dst):
+        """
+        Consistent copy of the events DB via the SQLite online backup API
+        Safe with WAL and a live writer, unlike copying the file
+        """
+        dst_conn = sqlite3.connect(dst)
+        try:
+            self._db_conn.backup(dst_conn, pages=1024)
+        finally:
+            dst_conn.close()
+        logger.info(f"Database snapshot written to {dst}")
     
     async def _os_level_ble_cleanup(self, mac_address):
         """
@@ -583,7 +770,7 @@ class TrainDetector:
         - Logged
         - Not executed frequently
         """
-        current_time = time.time()
+        current_time = time.monotonic()
         
         # Check cooldown time
         if mac_address in self.os_cleanup_history:
@@ -599,15 +786,13 @@ class TrainDetector:
         logger.critical(
             f"TRIGGERING OS-LEVEL BLE CLEANUP for {mac_address}"
         )
-        print(f"\nOS-level BLE cleanup for {mac_address}...")
         
         # P0: Pause all BLE operations
         logger.warning("Pausing all BLE operations...")
-        print("Pausing all BLE operations...")
         self.ble_operations_paused = True
         
-        # P0: Wait for current operations to complete
-        await asyncio.sleep(2.0)
+        # P0: Wait for current operations to complete (returns at once if none in flight)
+        await self._wait_ble_idle(timeout=2.0)
         
         success = False
         
@@ -615,41 +800,36 @@ class TrainDetector:
             # Method 1: bluetoothctl remove (safer)
             logger.info(f"Attempting: bluetoothctl remove {mac_address}")
             
-            result = subprocess.run(
-                ['bluetoothctl', 'remove', mac_address],
-                capture_output=True,
-                text=True,
-                timeout=10
+            returncode, _, stderr = await self._run_os_command(
+                'bluetoothctl', 'remove', mac_address
             )
             
-            if result.returncode == 0:
+            if returncode == 0:
                 logger.info(f"bluetoothctl remove successful")
                 success = True
             else:
                 logger.warning(
-                    f"bluetoothctl remove failed: {result.stderr}"
+                    f"bluetoothctl remove failed: {stderr}"
                 )
                 
                 # Method 2: hciconfig reset (more aggressive, affects all devices)
                 logger.warning("Attempting fallback: hciconfig hci0 reset")
                 
-                result = subprocess.run(
-                    ['sudo', 'hciconfig', 'hci0', 'reset'],
-                    capture_output=True,
-                    text=True,
-                    timeout=10
+                returncode, _, stderr = await self._run_os_command(
+                    'sudo', 'hciconfig', 'hci0', 'reset'
                 )
                 
-                if result.returncode == 0:
+                if returncode == 0:
                     logger.info("hciconfig reset successful")
                     success = True
-                    # P0: Longer cooldown after reset
-                    logger.info("Cooling down after hciconfig reset (10s)...")
-                    await asyncio.sleep(10.0)
+                    # P0: Longer cooldown after reset (ends early once hci0 is back up)
+                    logger.info("Waiting for hci0 after reset (max 10s)...")
+                    if not await self._wait_adapter_up(timeout=10.0):
+                        logger.warning("hci0 not reported UP RUNNING after 10s")
                 else:
-                    logger.error(f"hciconfig reset failed: {result.stderr}")
+                    logger.error(f"hciconfig reset failed: {stderr}")
         
-        except subprocess.TimeoutExpired:
+        except asyncio.TimeoutError:
             logger.error("OS cleanup command timeout")
         except FileNotFoundError as e:
             logger.error(f"Command not found: {e}")
@@ -663,7 +843,6 @@ class TrainDetector:
             
             self.ble_operations_paused = False
             logger.info("BLE operations resumed")
-            print("BLE operations resumed\n")
         
         # Record cleanup history
         if success:
@@ -673,13 +852,82 @@ class TrainDetector:
                 f"OS cleanup completed for {mac_address} "
                 f"(total: {self.stats['total_os_cleanups']})"
             )
-            print(f"OS-level cleanup completed\n")
         else:
             logger.error(f"OS cleanup failed for {mac_address}")
-            print(f"OS-level cleanup failed\n")
         
         return success
     
+    async def _wait_ble_idle(self, timeout):
+        """Wait (up to timeout) until no IMU has a connect/reconnect in flight"""
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(imu.wait_connect_idle() for imu in self.imus.values())),
+                timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning("BLE operations still in flight, continuing cleanup")
+    
+    async def _wait_adapter_up(self, timeout):
+        """Probe `hciconfig hci0` every 500ms until it reports UP RUNNING"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.5)
+            try:
+                returncode, stdout, _ = await self._run_os_command('hciconfig', 'hci0', timeout=2)
+            except (asyncio.TimeoutError, OSError):
+                continue
+            if returncode == 0 and 'UP RUNNING' in stdout:
+                return True
+        return False
+    
+    async def _run_os_command(self, *args, timeout=10):
+        """
+        Run an external command without blocking the event loop
+        Returns (returncode, stdout text, stderr text); raises asyncio.TimeoutError after killing it
+        """
+        proc = await asyncio.create_subprocess_exec(
+            *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            raise
+        return proc.returncode, stdout.decode(errors='replace'), stderr.decode(errors='replace')
+    
+    def _apply_ble_conn_interval(self):
+        """
+        NEW: Set the adapter's LE connection interval range (config 'ble')
+        
+        BlueZ has no D-Bus call for a central to pick connection parameters;
+        the debugfs defaults apply to every connection made afterwards.
+        Units are 1.25 ms (6 = 7.5 ms). Needs root; failure is non-fatal.
+        """
+        ble_config = self.config.get('ble', {})
+        min_interval = ble_config.get('conn_min_interval')
+        max_interval = ble_config.get('conn_max_interval')
+        if min_interval is None or max_interval is None:
+            return
+        
+        debugfs_dir = Path('/sys/kernel/debug/bluetooth/hci0')
+        min_path = debugfs_dir / 'conn_min_interval'
+        max_path = debugfs_dir / 'conn_max_interval'
+        try:
+            # The kernel rejects min > max at each write, so order the writes
+            if min_interval > int(max_path.read_text()):
+                writes = ((max_path, max_interval), (min_path, min_interval))
+            else:
+                writes = ((min_path, min_interval), (max_path, max_interval))
+            for path, value in writes:
+                path.write_text(f"{int(value)}\n")
+            logger.info(f"BLE connection interval set: {min_interval}-{max_interval} "
+                        f"({min_interval * 1.25:.2f}-{max_interval * 1.25:.2f} ms)")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not set BLE connection interval (non-fatal): {e}")
+    
     async def start(self):
         """
         Start system
@@ -704,8 +952,13 @@ class TrainDetector:
             name = dev_config['name']
             mac = dev_config['mac']
             
-            imu = IMUManager(number, name, mac, self._data_callback, self.config)
+            # Data callback is installed once detection starts (see _set_data_callback)
+            imu = IMUManager(number, name, mac, None, self.config)
             self.imus[number] = imu
+        self._sorted_imu_keys = sorted(self.imus)
+        
+        # Optional: shorter BLE connection interval for the links made below
+        self._apply_ble_conn_interval()
         
         # Serial connection of all devices (critical! No concurrency!)
         print("=" * 60)
@@ -713,7 +966,7 @@ class TrainDetector:
         print("=" * 60)
         
         connected_count = 0
-        for number in sorted(self.imus.keys()):
+        for number in self._sorted_imu_keys:
             imu = self.imus[number]
             
             print(f"\n[{number}/{len(self.imus)}] Connecting {imu.name}...")
@@ -738,6 +991,7 @@ class TrainDetector:
         
         # Start detection
         self.running = True
+        self._set_data_callback(self._detect_callback)
         print("\nDetection started!")
         print(f"Monitoring {connected_count} device(s)...\n")
         
@@ -758,6 +1012,7 @@ class TrainDetector:
         print("=" * 60)
         
         self.running = False
+        self._set_data_callback(None)
         
         # Save recording in progress
         if self.recording:
@@ -766,41 +1021,65 @@ class TrainDetector:
         
         # Serial disconnect all devices
         print("\nDisconnecting devices serially...")
-        for number in sorted(self.imus.keys()):
+        for number in self._sorted_imu_keys:
             imu = self.imus[number]
             if imu.is_ready:
                 await imu.disconnect()
                 await asyncio.sleep(0.5)  # Give system time to clean up
         
+        # Wait for any pending event save to finish, then for queued DB rows
+        # (in order, since saves feed the CSV and DB executors; off the event loop)
+        loop = asyncio.get_event_loop()
+        for executor in (self._save_executor, self._csv_write_executor, self._db_executor):
+            await loop.run_in_executor(None, executor.shutdown, True)
+        self._db_conn.close()
+        
+        await self.health_uploader.close()
+        
         print("\nShutdown complete")
         print("=" * 60)
     
-    def _data_callback(self, device_number, timestamp, data):
-        """IMU data callback (detection logic)"""
-        if not self.running:
-            return
-        
-        # Calculate acceleration magnitude
-        acc_x = data.get('AccX', 0)
-        acc_y = data.get('AccY', 0)
-        acc_z = data.get('AccZ', 0)
-        magnitude = (acc_x**2 + acc_y**2 + acc_z**2)**0.5
-        
-        # Detect trigger
-        if not self.recording and magnitude > self.threshold:
-            self._trigger_detection(device_number, timestamp, magnitude)
-        
-        # Record data
-        if self.recording:
-            if device_number not in self.event_data:
-                self.event_data[device_number] = []
-            self.event_data[device_number].append((timestamp, data.copy()))
-            
-            # Check if finished
-            elapsed = timestamp - self.trigger_time
-            if elapsed >= self.post_trigger_duration:
-                # Schedule async save without blocking
-                asyncio.create_task(self._end_recording())
+    def _set_data_callback(self, callback):
+        """
+        Install the per-sample callback on every IMU
+        _detect_callback while idle, _record_callback while recording, None when stopped,
+        so the hot path never re-checks running/recording flags
+        """
+        for imu in self.imus.values():
+            imu.data_callback = callback
+    
+    def _detect_callback(self, device_number, timestamp, data):
+        """IMU data callback while waiting for a trigger"""
+        # Squared magnitude (sqrt only when it fires)
+        acc_x = data.AccX
+        acc_y = data.AccY
+        acc_z = data.AccZ
+        magnitude_sq = acc_x * acc_x + acc_y * acc_y + acc_z * acc_z
+        
+        if magnitude_sq > self._threshold_sq:
+            self._trigger_detection(device_number, timestamp, magnitude_sq ** 0.5)
+            # Triggering sample is the first recorded one
+            self._record_callback(device_number, timestamp, data)
+    
+    def _record_callback(self, device_number, timestamp, data):
+        """IMU data callback while recording an event"""
+        acc_x = data.AccX
+        acc_y = data.AccY
+        acc_z = data.AccZ
+        magnitude_sq = acc_x * acc_x + acc_y * acc_y + acc_z * acc_z
+        if magnitude_sq > self.event_peak_sq:
+            self.event_peak_sq = magnitude_sq
+        
+        if device_number not in self.event_data:
+            self.event_data[device_number] = []
+        # data is an immutable IMUSample; stored by reference
+        self.event_data[device_number].append((timestamp, data))
+        
+        # Check if finished
+        elapsed = timestamp - self.trigger_time
+        if elapsed >= self.post_trigger_duration:
+            # Schedule async save without blocking
+            asyncio.create_task(self._end_recording())
     
     def _trigger_detection(self, device_number, timestamp, magnitude):
         """Trigger detection"""
@@ -810,6 +1089,7 @@ class TrainDetector:
             return
         
         self.recording = True
+        self._set_data_callback(self._record_callback)
         self.trigger_time = timestamp
         self.trigger_device = device_number
         
@@ -819,10 +1099,11 @@ class TrainDetector:
         # Ensure uniqueness by adding counter if needed
         event_id = base_id
         counter = 1
-        while (self.output_dir / f"event_{event_id}").exists():
+        while f"event_{event_id}" in self._event_dirs:
             event_id = f"{base_id}_{counter}"
             counter += 1
         
+        self._event_dirs.add(f"event_{event_id}")
         self.event_id = event_id
         self.event_data = {}
         
@@ -832,12 +1113,17 @@ class TrainDetector:
         print(f"   Magnitude: {magnitude:.3f}g")
         print(f"   Recording for {self.post_trigger_duration}s...")
         
-        # Collect buffer data
+        # Collect buffer data (peak over the pre-trigger samples is taken once here)
+        self.event_peak_sq = 0.0
         for num, imu in self.imus.items():
             if imu.is_ready:
                 buffer_data = imu.get_buffer_data()
                 if buffer_data:
-                    self.event_data[num] = buffer_data.copy()
+                    self.event_data[num] = buffer_data
+                    self.event_peak_sq = max(self.event_peak_sq, max(
+                        data.AccX**2 + data.AccY**2 + data.AccZ**2
+                        for _, data in buffer_data
+                    ))
                     print(f"   Captured {len(buffer_data)} samples from IMU-{num}")
     
     async def _end_recording(self):
@@ -853,6 +1139,8 @@ class TrainDetector:
             
             # Mark as not recording immediately to allow new detections
             self.recording = False
+            if self.running:
+                self._set_data_callback(self._detect_callback)
             
             duration = time.time() - self.trigger_time
             print(f"\nSaving event data...")
@@ -863,6 +1151,7 @@ class TrainDetector:
             trigger_device = self.trigger_device
             trigger_time = self.trigger_time
             event_data_copy = {k: list(v) for k, v in self.event_data.items()}
+            max_acc = self.event_peak_sq ** 0.5
             
             # Clear event data immediately
             self.event_data = {}
@@ -871,13 +1160,14 @@ class TrainDetector:
             try:
                 loop = asyncio.get_event_loop()
                 await loop.run_in_executor(
-                    None,
+                    self._save_executor,
                     self._save_event_data_sync,
                     event_id,
                     trigger_device,
                     trigger_time,
                     duration,
-                    event_data_copy
+                    event_data_copy,
+                    max_acc
                 )
             except Exception as e:
                 logger.error(f"Background save error: {e}")
@@ -888,17 +1178,22 @@ class TrainDetector:
             self.stats['total_events'] += 1
             self.stats['last_event_time'] = trigger_time
     
-    def _save_event_data_sync(self, event_id, trigger_device, trigger_time, duration, event_data_copy):
+    def _save_event_data_sync(self, event_id, trigger_device, trigger_time, duration, event_data_copy, max_acc):
         """
         Synchronous file I/O (runs in executor)
         This prevents blocking the async event loop
         Includes robust error handling and disk space check
+        max_acc is the event peak already tracked during recording (no re-scan here)
         """
         try:
-            # Check available disk space
+            # Check available disk space (statvfs at most every 30s unless already low)
             try:
-                stat = os.statvfs(self.output_dir)
-                available_mb = (stat.f_bavail * stat.f_frsize) / (1024 * 1024)
+                checked_at, available_mb = self._disk_free
+                now = time.monotonic()
+                if available_mb < 100 or now - checked_at > 30:
+                    stat = os.statvfs(self.output_dir)
+                    available_mb = (stat.f_bavail * stat.f_frsize) / (1024 * 1024)
+                    self._disk_free = (now, available_mb)
                 
                 if available_mb < 100:  # Less than 100MB
                     logger.warning(f"Low disk space: {available_mb:.1f}MB available")
@@ -916,44 +1211,28 @@ class TrainDetector:
                 return
             
             # Save data files
-            max_acc = 0
             saved_files = []
+            format_ts = _TimestampFormatter()
             
+            # Text is built here; file writes (and gzip) overlap on the CSV writer pool
+            pending_writes = []
             for dev_num, data_list in event_data_copy.items():
                 if not data_list:
                     continue
                 
-                csv_path = event_dir / f"device_{dev_num}.csv"
-                
+                # Rows are numeric only (nothing to quote): join and write once
+                text = CSV_HEADER + ''.join([
+                    f"{format_ts(ts)},{','.join(map(str, map(round, data, CSV_DECIMALS)))}\r\n"
+                    for ts, data in data_list
+                ])
+                future = self._csv_write_executor.submit(self._write_device_csv, event_dir, dev_num, text)
+                pending_writes.append((dev_num, len(data_list), future))
+            
+            for dev_num, num_samples, future in pending_writes:
                 try:
-                    with open(csv_path, 'w', newline='') as f:
-                        fieldnames = ['timestamp', 'AccX', 'AccY', 'AccZ', 
-                                    'AngX', 'AngY', 'AngZ', 'AsX', 'AsY', 'AsZ']
-                        writer = csv.DictWriter(f, fieldnames=fieldnames)
-                        writer.writeheader()
-                        
-                        for ts, data in data_list:
-                            row = {
-                                'timestamp': datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S.%f'),
-                                'AccX': data.get('AccX', ''),
-                                'AccY': data.get('AccY', ''),
-                                'AccZ': data.get('AccZ', ''),
-                                'AngX': data.get('AngX', ''),
-                                'AngY': data.get('AngY', ''),
-                                'AngZ': data.get('AngZ', ''),
-                                'AsX': data.get('AsX', ''),
-                                'AsY': data.get('AsY', ''),
-                                'AsZ': data.get('AsZ', '')
-                            }
-                            writer.writerow(row)
-                            
-                            acc = (data.get('AccX', 0)**2 + 
-                                  data.get('AccY', 0)**2 + 
-                                  data.get('AccZ', 0)**2)**0.5
-                            max_acc = max(max_acc, acc)
-                    
+                    future.result()
                     saved_files.append(dev_num)
-                    print(f"   Saved IMU-{dev_num}: {len(data_list)} samples")
+                    print(f"   Saved IMU-{dev_num}: {num_samples} samples")
                     
                 except IOError as e:
                     logger.error(f"Failed to save IMU-{dev_num} data: {e}")
@@ -979,7 +1258,8 @@ class TrainDetector:
             
             try:
                 with open(event_dir / 'metadata.json', 'w') as f:
-                    json.dump(metadata, f, indent=2)
+                    # Compact encoding (no indent) and one write, not one per token
+                    f.write(json.dumps(metadata, separators=(',', ':')))
             except IOError as e:
                 logger.error(f"Failed to save metadata: {e}")
                 print(f"   ERROR: Could not save metadata: {e}")
@@ -995,40 +1275,57 @@ class TrainDetector:
             logger.error(f"Error saving event data: {e}")
             print(f"   ERROR saving event: {e}\n")
     
+    def _write_device_csv(self, event_dir, dev_num, text):
+        """Write one device's CSV text (runs on the CSV writer pool)"""
+        if self.compress_csv:
+            f = gzip.open(event_dir / f"device_{dev_num}.csv.gz", 'wt', newline='', compresslevel=1)
+        else:
+            f = open(event_dir / f"device_{dev_num}.csv", 'w', newline='')
+        with f:
+            f.write(text)
+    
     def _save_to_database(self, metadata, data_path, trigger_time):
-        """Save to database with explicit column names"""
+        """Queue event row for the DB writer (returns immediately)"""
+        self._db_queue.put((
+            metadata['event_id'],
+            trigger_time,
+            trigger_time + metadata['duration'],
+            metadata['duration'],
+            metadata['trigger_device'],
+            metadata['max_acceleration'],
+            metadata['num_devices'],
+            data_path,
+            datetime.now().isoformat()
+        ))
+        self._db_executor.submit(self._drain_db_queue)
+    
+    def _drain_db_queue(self):
+        """
+        Write all queued event rows with one executemany in a single transaction
+        Runs on the DB writer; rows queued while a drain is running go in the next one
+        """
+        rows = []
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Use explicit column names to avoid schema mismatch issues
-            cursor.execute('''
-                INSERT INTO events 
-                (event_id, start_time, end_time, duration, trigger_device, 
-                 max_acceleration, num_devices, data_path, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                metadata['event_id'],
-                trigger_time,
-                trigger_time + metadata['duration'],
-                metadata['duration'],
-                metadata['trigger_device'],
-                metadata['max_acceleration'],
-                metadata['num_devices'],
-                data_path,
-                datetime.now().isoformat()
-            ))
-            
-            conn.commit()
-            conn.close()
+            while len(rows) < 50:
+                rows.append(self._db_queue.get_nowait())
+        except queue.Empty:
+            pass
+        if not rows:
+            return
+        
+        try:
+            # Single transaction on the shared connection (commits on exit)
+            with self._db_conn:
+                self._db_conn.executemany(INSERT_EVENT_SQL, rows)
         except Exception as e:
             logger.error(f"Database error: {e}")
             print(f"   Database error: {e}")
             print(f"   TIP: If schema mismatch, delete {self.db_path} and restart")
     
     def print_status(self):
-        """Print status"""
-        uptime = time.time() - self.stats['uptime_start']
+        """Print status (built as one block of lines, written once)"""
+        now = time.time()
+        uptime = now - self.stats['uptime_start']
         
         logger.info("=" * 60)
         logger.info("SYSTEM STATUS")
@@ -1036,60 +1333,67 @@ class TrainDetector:
                    f"Reconnects: {self.stats['total_reconnects']} | "
                    f"OS Cleanups: {self.stats['total_os_cleanups']}")
         
-        print("\n" + "=" * 60)
-        print("SYSTEM STATUS")
-        print("=" * 60)
-        print(f"Uptime: {uptime/3600:.1f} hours")
-        print(f"Total Events: {self.stats['total_events']}")
-        print(f"Reconnects: {self.stats['total_reconnects']}")
-        print(f"OS Cleanups: {self.stats['total_os_cleanups']}")
+        lines = [
+            "\n" + "=" * 60,
+            "SYSTEM STATUS",
+            "=" * 60,
+            f"Uptime: {uptime/3600:.1f} hours",
+            f"Total Events: {self.stats['total_events']}",
+            f"Reconnects: {self.stats['total_reconnects']}",
+            f"OS Cleanups: {self.stats['total_os_cleanups']}",
+        ]
         
         if self.health_uploader.enabled:
-            print(f"Upload Count: {self.health_uploader.upload_count}")
-            print(f"Upload Failures: {self.health_uploader.upload_failures}")
-        
-        if self.stats['last_event_time']:
-            last = datetime.fromtimestamp(self.stats['last_event_time'])
-            print(f"Last Event: {last.strftime('%Y-%m-%d %H:%M:%S')}")
-        
-        print(f"\nIMUs: {len(self.imus)}")
-        for num in sorted(self.imus.keys()):
+            lines.append(f"Upload Count: {self.health_uploader.upload_count}")
+            lines.append(f"Upload Failures: {self.health_uploader.upload_failures}")
+        
+        last_event_time = self.stats['last_event_time']
+        if last_event_time:
+            # Formatted once per new event, not on every status tick
+            if self._last_event_str[0] != last_event_time:
+                last = datetime.fromtimestamp(last_event_time)
+                self._last_event_str = (last_event_time, last.strftime('%Y-%m-%d %H:%M:%S'))
+            lines.append(f"Last Event: {self._last_event_str[1]}")
+        
+        lines.append(f"\nIMUs: {len(self.imus)}")
+        for num in self._sorted_imu_keys:
             imu = self.imus[num]
             status = "READY" if imu.is_ready else "DISCONNECTED"
             buffer = len(imu.buffer)
             
             # Display health status
-            health_info = ""
+            health_info = []
             if imu.is_ready and imu.device:
-                is_healthy, _ = imu.device.check_health(imu.DATA_TIMEOUT)
-                window_healthy, _, window_stats = imu.device.check_sliding_window_health()
+                is_healthy, window_healthy, window_stats = imu.device.get_health_snapshot(imu.DATA_TIMEOUT)
                 
                 if not is_healthy or not window_healthy:
-                    health_info = " UNHEALTHY"
+                    health_info.append(" UNHEALTHY")
                 
                 if imu.device.consecutive_failures > 0:
-                    health_info += f" (failures: {imu.device.consecutive_failures})"
+                    health_info.append(f" (failures: {imu.device.consecutive_failures})")
                 
                 # Show sliding window stats
                 if window_stats:
-                    health_info += f" (window: {window_stats.get('unhealthy_percentage', 0):.0f}%)"
+                    health_info.append(f" (window: {window_stats.get('unhealthy_percentage', 0):.0f}%)")
             
-            print(f"  IMU-{num}: {status} (Buffer: {buffer}){health_info}")
+            lines.append(f"  IMU-{num}: {status} (Buffer: {buffer}){''.join(health_info)}")
             
             if imu.current_data:
                 acc = imu.current_data
                 # Display last data time
                 if imu.device and imu.device.last_data_time > 0:
-                    elapsed = time.time() - imu.device.last_data_time
+                    elapsed = time.monotonic() - imu.device.last_data_time  # Device clock is monotonic
                     time_info = f" (last data: {elapsed:.1f}s ago)"
                 else:
                     time_info = ""
                 
-                print(f"    Acc: X={acc.get('AccX', 0):6.3f}g "
-                      f"Y={acc.get('AccY', 0):6.3f}g "
-                      f"Z={acc.get('AccZ', 0):6.3f}g{time_info}")
+                lines.append(f"    Acc: X={acc.AccX:6.3f}g "
+                             f"Y={acc.AccY:6.3f}g "
+                             f"Z={acc.AccZ:6.3f}g{time_info}")
         
-        print("=" * 60 + "\n")
+        lines.append("=" * 60 + "\n")
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()  # Block-buffered under systemd: emit the report now, in one write
     
     async def run(self):
         """
@@ -1099,110 +1403,137 @@ class TrainDetector:
         - Trigger OS cleanup (extreme cases)
         - NEW: Upload health data
         - P0: Global throttling to prevent reconnection storm
+        Status and health run as independent tasks, so a long reconnect
+        or OS cleanup does not delay status reports and uploads
         """
         logger.info("System running, press Ctrl+C to stop")
         print("Press Ctrl+C to stop\n")
         
         status_interval = self.config.get('status_report_interval', 30)
-        last_status = time.time()
         health_check_interval = 2  # Check every 2 seconds
-        last_health_check = time.time()
+        
+        status_task = asyncio.create_task(self._status_loop(status_interval))
+        health_task = asyncio.create_task(self._health_loop(health_check_interval))
         
         try:
-            while self.running:
-                await asyncio.sleep(1)
+            done, _ = await asyncio.wait(
+                (status_task, health_task), return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                task.result()  # Re-raise loop errors
+        except asyncio.CancelledError:
+            logger.warning("Run loop cancelled")
+            print("\nRun loop cancelled")
+        finally:
+            # Status loop only sleeps/prints; on a normal stop the health loop
+            # finishes its current iteration (possibly a reconnect) on its own
+            status_task.cancel()
+            if self.running:
+                health_task.cancel()
+            await asyncio.gather(status_task, health_task, return_exceptions=True)
+            await self.shutdown()
+    
+    async def _status_loop(self, interval):
+        """Status report and health upload every `interval` seconds"""
+        # Scheduling uses the monotonic clock (immune to wall-clock jumps)
+        next_status = time.monotonic() + interval
+        
+        while self.running:
+            await asyncio.sleep(max(0.0, next_status - time.monotonic()))
+            if not self.running:
+                break
+            
+            self.print_status()
+            next_status = time.monotonic() + interval
+            
+            # NEW: Upload health data
+            try:
+                await self.health_uploader.upload_health_data(
+                    self.imus,
+                    self.stats
+                )
+            except Exception as e:
+                # Do not let upload errors affect main loop
+                logger.debug("Health upload exception: %s", e)
+    
+    async def _health_loop(self, interval):
+        """Health monitoring + automatic reconnection every `interval` seconds"""
+        # Scheduling and cooldowns use the monotonic clock (immune to wall-clock jumps)
+        next_health_check = time.monotonic() + interval
+        
+        while self.running:
+            await asyncio.sleep(max(0.0, next_health_check - time.monotonic()))
+            if not self.running:
+                break
+            
+            current_time = time.monotonic()
+            next_health_check = current_time + interval
+            
+            # P0: If BLE operations are paused, skip all checks
+            if self.ble_operations_paused:
+                continue
+            
+            for num, imu in self.imus.items():
+                if not imu.is_ready:
+                    continue
                 
-                current_time = time.time()
+                # P0: Global reconnection throttling check
+                time_since_last_reconnect = current_time - self.last_reconnect_time
+                if time_since_last_reconnect < self.reconnect_global_cooldown:
+                    # Too fast, skip this device
+                    # Lazy %-formatting: skipped entirely unless DEBUG is enabled
+                    logger.debug(
+                        "[IMU-%s] Skipping check (global cooldown: %.1fs / %ss)",
+                        num, time_since_last_reconnect, self.reconnect_global_cooldown
+                    )
+                    continue
                 
-                # Periodically print status
-                if current_time - last_status >= status_interval:
-                    self.print_status()
-                    last_status = current_time
-                    
-                    # NEW: Upload health data
-                    try:
-                        await self.health_uploader.upload_health_data(
-                            self.imus,
-                            self.stats
-                        )
-                    except Exception as e:
-                        # Do not let upload errors affect main loop
-                        logger.debug(f"Health upload exception: {e}")
+                # Health check + reconnect
+                reconnected = await imu.check_and_reconnect(current_time)
                 
-                # P0: If BLE operations are paused, skip all checks
-                if self.ble_operations_paused:
-                    continue
+                if reconnected:
+                    # P0: Update global reconnect time
+                    self.last_reconnect_time = current_time
+                    self.stats['total_reconnects'] += 1
+                    logger.info(
+                        f"Total reconnects: {self.stats['total_reconnects']}"
+                    )
                 
-                # Health monitoring + automatic reconnection
-                if current_time - last_health_check >= health_check_interval:
-                    last_health_check = current_time
+                # Check if OS cleanup is needed
+                if imu.should_trigger_os_cleanup():
+                    # P0: Global OS cleanup throttling check
+                    time_since_last_os_cleanup = current_time - self.last_os_cleanup_global
+                    if time_since_last_os_cleanup < self.os_cleanup_global_cooldown:
+                        logger.warning(
+                            f"[IMU-{num}] OS cleanup requested but in GLOBAL cooldown "
+                            f"({time_since_last_os_cleanup:.0f}s / {self.os_cleanup_global_cooldown}s)"
+                        )
+                        continue
                     
-                    for num, imu in self.imus.items():
-                        if not imu.is_ready:
-                            continue
-                        
-                        # P0: Global reconnection throttling check
-                        time_since_last_reconnect = current_time - self.last_reconnect_time
-                        if time_since_last_reconnect < self.reconnect_global_cooldown:
-                            # Too fast, skip this device
-                            logger.debug(
-                                f"[IMU-{num}] Skipping check (global cooldown: "
-                                f"{time_since_last_reconnect:.1f}s / {self.reconnect_global_cooldown}s)"
-                            )
-                            continue
-                        
-                        # Health check + reconnect
-                        reconnected = await imu.check_and_reconnect()
+                    logger.critical(
+                        f"[IMU-{num}] Consecutive failures threshold reached, "
+                        f"triggering OS cleanup"
+                    )
+                    
+                    # Execute OS cleanup (automatically pauses all BLE operations)
+                    cleanup_success = await self._os_level_ble_cleanup(imu.mac)
+                    
+                    # P0: Update global OS cleanup time
+                    self.last_os_cleanup_global = current_time
+                    
+                    if cleanup_success:
+                        # Reset device failure count
+                        if imu.device:
+                            imu.device.consecutive_failures = 0
                         
-                        if reconnected:
-                            # P0: Update global reconnect time
-                            self.last_reconnect_time = current_time
-                            self.stats['total_reconnects'] += 1
-                            logger.info(
-                                f"Total reconnects: {self.stats['total_reconnects']}"
-                            )
+                        # Wait for system to stabilize then try to reconnect
+                        await asyncio.sleep(3.0)
                         
-                        # Check if OS cleanup is needed
-                        if imu.should_trigger_os_cleanup():
-                            # P0: Global OS cleanup throttling check
-                            time_since_last_os_cleanup = current_time - self.last_os_cleanup_global
-                            if time_since_last_os_cleanup < self.os_cleanup_global_cooldown:
-                                logger.warning(
-                                    f"[IMU-{num}] OS cleanup requested but in GLOBAL cooldown "
-                                    f"({time_since_last_os_cleanup:.0f}s / {self.os_cleanup_global_cooldown}s)"
-                                )
-                                continue
-                            
-                            logger.critical(
-                                f"[IMU-{num}] Consecutive failures threshold reached, "
-                                f"triggering OS cleanup"
-                            )
-                            
-                            # Execute OS cleanup (automatically pauses all BLE operations)
-                            cleanup_success = await self._os_level_ble_cleanup(imu.mac)
-                            
-                            # P0: Update global OS cleanup time
-                            self.last_os_cleanup_global = current_time
-                            
-                            if cleanup_success:
-                                # Reset device failure count
-                                if imu.device:
-                                    imu.device.consecutive_failures = 0
-                                
-                                # Wait for system to stabilize then try to reconnect
-                                await asyncio.sleep(3.0)
-                                
-                                logger.info(f"[IMU-{num}] Attempting reconnect after OS cleanup...")
-                                await imu.connect()
-                            
-                            # P0: Forced wait after OS cleanup, don't check other devices
-                            break
-                
-        except asyncio.CancelledError:
-            logger.warning("Run loop cancelled")
-            print("\nRun loop cancelled")
-        finally:
-            await self.shutdown()
+                        logger.info(f"[IMU-{num}] Attempting reconnect after OS cleanup...")
+                        await imu.connect()
+                    
+                    # P0: Forced wait after OS cleanup, don't check other devices
+                    break
 
 
 async def main():
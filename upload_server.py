@@ -7,9 +7,33 @@ import asyncio
 import json
 import logging
 from datetime import datetime
+from html import escape
 from pathlib import Path
+from types import MappingProxyType
 from aiohttp import web
 import sqlite3
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# orjson is optional: faster parse/serialize when installed, stdlib json otherwise.
+# Both loads() accept bytes and raise a json.JSONDecodeError subclass on bad input.
+try:
+    import orjson
+    json_loads = orjson.loads
+    json_dumps = orjson.dumps
+except ImportError:
+    orjson = None
+    json_loads = json.loads
+
+    def json_dumps(obj):
+        return json.dumps(obj).encode('utf-8')
+
+# uvloop is optional as well: used as the event loop when installed
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
 # Configure logging
 logging.basicConfig(
@@ -22,17 +46,167 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Insert statements, defined once; the same string objects hit sqlite3's statement cache
+INSERT_SYSTEM_STATUS_SQL = (
+    "INSERT INTO system_status "
+    "(timestamp, uptime_hours, total_events, total_reconnects, "
+    "total_os_cleanups, upload_count, upload_failures) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+INSERT_IMU_STATUS_SQL = (
+    "INSERT INTO imu_status "
+    "(system_id, timestamp, imu_number, imu_name, mac_address, "
+    "is_ready, state, consecutive_failures, buffer_size, "
+    "time_since_last_data, basic_health_status, basic_health_reason, "
+    "window_health_status, window_health_reason, "
+    "window_total_checks, window_unhealthy_count, window_unhealthy_percentage, "
+    "acc_x, acc_y, acc_z) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+INSERT_ALERT_SQL = (
+    "INSERT INTO alerts "
+    "(timestamp, imu_number, imu_name, alert_type, severity, message) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+
+# Upload ack body (only the alert count varies); same bytes as json.dumps would give
+STATUS_OK_TEMPLATE = b'{"status": "ok", "alerts_generated": %d}'
+
+
+# One alert; field order matches INSERT_ALERT_SQL so rows bind directly
+Alert = namedtuple('Alert', 'timestamp imu_number imu_name alert_type severity message')
+
+# Shared read-only default for missing nested sections (no fresh {} per lookup)
+_EMPTY = MappingProxyType({})
+
+
+def _imu_row(system_id, timestamp, imu):
+    """Flatten one uploaded IMU entry into an imu_status row"""
+    device_health = imu.get('device_health', _EMPTY)
+    basic_health = device_health.get('basic_health', _EMPTY)
+    sliding_window = device_health.get('sliding_window', _EMPTY)
+    window_stats = sliding_window.get('stats', _EMPTY)
+    current_data = imu.get('current_data', _EMPTY)
+    
+    return (
+        system_id,
+        timestamp,
+        imu.get('number', 0),
+        imu.get('name', ''),
+        imu.get('mac', ''),
+        imu.get('is_ready', False),
+        device_health.get('state', 'unknown'),
+        device_health.get('consecutive_failures', 0),
+        imu.get('buffer_size', 0),
+        device_health.get('time_since_last_data', -1),
+        basic_health.get('healthy', True),
+        basic_health.get('reason', ''),
+        sliding_window.get('healthy', True),
+        sliding_window.get('reason', ''),
+        window_stats.get('total_checks', 0),
+        window_stats.get('unhealthy_count', 0),
+        window_stats.get('unhealthy_percentage', 0.0),
+        current_data.get('AccX', 0.0),
+        current_data.get('AccY', 0.0),
+        current_data.get('AccZ', 0.0)
+    )
+
+
+def _alerts_for(imu, timestamp):
+    """Yield the alerts raised by one uploaded IMU entry (usually none)"""
+    imu_number = imu.get('number', 0)
+    imu_name = imu.get('name', 'Unknown')
+    device_health = imu.get('device_health', _EMPTY)
+    
+    # Alert: Device not ready
+    if not imu.get('is_ready', False):
+        yield Alert(timestamp, imu_number, imu_name, 'device_offline', 'high',
+                    f"IMU-{imu_number} ({imu_name}) is not ready")
+    
+    # Alert: High consecutive failures
+    consecutive_failures = device_health.get('consecutive_failures', 0)
+    if consecutive_failures >= 2:
+        yield Alert(timestamp, imu_number, imu_name, 'high_failures', 'medium',
+                    f"IMU-{imu_number} has {consecutive_failures} consecutive failures")
+    
+    # Alert: Sliding window unhealthy
+    sliding_window = device_health.get('sliding_window', _EMPTY)
+    unhealthy_percentage = sliding_window.get('stats', _EMPTY).get('unhealthy_percentage', 0.0)
+    if unhealthy_percentage >= 50.0 and not sliding_window.get('healthy', True):
+        yield Alert(timestamp, imu_number, imu_name, 'sliding_window_failure', 'medium',
+                    f"IMU-{imu_number} sliding window: {unhealthy_percentage:.1f}% unhealthy")
+    
+    # Alert: No data for extended period
+    time_since_last_data = device_health.get('time_since_last_data', 0)
+    if time_since_last_data > 10.0:
+        yield Alert(timestamp, imu_number, imu_name, 'no_data', 'high',
+                    f"IMU-{imu_number} no data for {time_since_last_data:.1f}s")
+
+
+# JSON responses at least this large are sent compressed (gzip/deflate)
+COMPRESS_MIN_BYTES = 1024
+
+# Status page template; only the counters are filled in per request
+INDEX_HTML = """
+        <html>
+        <head><title>IMU Health Monitor</title></head>
+        <body>
+            <h1>IMU Health Monitoring Server</h1>
+            <p>Status: Running</p>
+            <p>Total Requests: {total_requests}</p>
+            <p>Total Errors: {total_errors}</p>
+            <p>Last Update: {last_update}</p>
+            <h2>API Endpoints</h2>
+            <ul>
+                <li>POST /api/imu/status - Receive IMU health data</li>
+                <li>GET /api/system/recent?limit=10 - Recent system status</li>
+                <li>GET /api/alerts/active - Active alerts</li>
+                <li>GET /api/stats - Server statistics</li>
+            </ul>
+        </body>
+        </html>
+        """
+
+
+def json_response(obj):
+    """JSON response serialized with json_dumps (orjson when available)"""
+    return json_body_response(json_dumps(obj))
+
+
+def json_body_response(body):
+    """JSON response from an already serialized body"""
+    response = web.Response(body=body, content_type='application/json', charset='utf-8')
+    # Compress larger bodies (alert/status lists) when the client accepts it;
+    # small ones would cost more in CPU and headers than they save
+    if len(body) >= COMPRESS_MIN_BYTES:
+        response.enable_compression()
+    return response
+
 
 class HealthDataStore:
     """Store health data to SQLite database"""
     
     def __init__(self, db_path="health_data.db"):
         self.db_path = db_path
+        # One long-lived connection shared by all calls (serialized by the lock)
+        self._conn = None
+        self._lock = threading.Lock()
         self._init_database()
     
     def _init_database(self):
-        """Initialize database schema"""
-        conn = sqlite3.connect(self.db_path)
+        """Open the shared connection (re-opens if db_path changed) and initialize schema"""
+        if self._conn is not None:
+            self._conn.close()
+        
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=256)
+        self._conn = conn
+        
+        # WAL: readers don't block the writer; NORMAL sync: fsync per checkpoint, not per commit
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-20000")
+        
         cursor = conn.cursor()
         
         # System status table
@@ -91,209 +265,129 @@ class HealthDataStore:
             )
         ''')
         
+        # Indexes for the read paths: active alerts (WHERE resolved = 0 ORDER BY id DESC)
+        # and IMU rows by their parent status record. system_status is read by rowid.
+        # The alerts index is partial, so resolved alerts never enter it.
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS ix_alerts_unresolved_id
+            ON alerts(id DESC) WHERE resolved = 0
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS ix_imu_status_system_id
+            ON imu_status(system_id)
+        ''')
+        
         conn.commit()
-        conn.close()
-        logger.info(f"Database initialized: {self.db_path}")
+        logger.info("Database initialized: %s", self.db_path)
+    
+    def close(self):
+        """Close the shared connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.execute("PRAGMA optimize")
+                self._conn.close()
+                self._conn = None
     
-    def store_health_data(self, data):
-        """Store received health data"""
+    def store_health_batch(self, batch):
+        """
+        Store several uploads and their alerts in one transaction
+        
+        Each upload runs under its own savepoint, so a malformed one is
+        skipped without rolling back the rest of the batch.
+        
+        Args:
+            batch: list of (data, alerts) tuples
+        
+        Returns:
+            Number of uploads stored
+        """
+        stored = 0
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Parse timestamp
-            timestamp = data.get('timestamp', datetime.now().isoformat())
-            system = data.get('system', {})
-            
-            # Calculate uptime
-            uptime_start = system.get('uptime_start', 0)
-            if uptime_start > 0:
-                uptime_hours = (datetime.now().timestamp() - uptime_start) / 3600
-            else:
-                uptime_hours = 0
-            
-            # Insert system status
-            cursor.execute('''
-                INSERT INTO system_status 
-                (timestamp, uptime_hours, total_events, total_reconnects, 
-                 total_os_cleanups, upload_count, upload_failures)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                timestamp,
-                uptime_hours,
-                system.get('total_events', 0),
-                system.get('total_reconnects', 0),
-                system.get('total_os_cleanups', 0),
-                system.get('upload_count', 0),
-                system.get('upload_failures', 0)
-            ))
-            
-            system_id = cursor.lastrowid
-            
-            # Insert IMU status
-            imus = data.get('imus', [])
-            for imu in imus:
-                device_health = imu.get('device_health', {})
-                basic_health = device_health.get('basic_health', {})
-                sliding_window = device_health.get('sliding_window', {})
-                window_stats = sliding_window.get('stats', {})
-                current_data = imu.get('current_data', {})
-                
-                cursor.execute('''
-                    INSERT INTO imu_status
-                    (system_id, timestamp, imu_number, imu_name, mac_address,
-                     is_ready, state, consecutive_failures, buffer_size,
-                     time_since_last_data, basic_health_status, basic_health_reason,
-                     window_health_status, window_health_reason,
-                     window_total_checks, window_unhealthy_count, window_unhealthy_percentage,
-                     acc_x, acc_y, acc_z)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    system_id,
-                    timestamp,
-                    imu.get('number', 0),
-                    imu.get('name', ''),
-                    imu.get('mac', ''),
-                    imu.get('is_ready', False),
-                    device_health.get('state', 'unknown'),
-                    device_health.get('consecutive_failures', 0),
-                    imu.get('buffer_size', 0),
-                    device_health.get('time_since_last_data', -1),
-                    basic_health.get('healthy', True),
-                    basic_health.get('reason', ''),
-                    sliding_window.get('healthy', True),
-                    sliding_window.get('reason', ''),
-                    window_stats.get('total_checks', 0),
-                    window_stats.get('unhealthy_count', 0),
-                    window_stats.get('unhealthy_percentage', 0.0),
-                    current_data.get('AccX', 0.0),
-                    current_data.get('AccY', 0.0),
-                    current_data.get('AccZ', 0.0)
-                ))
-            
-            conn.commit()
-            conn.close()
-            return True
+            with self._lock, self._conn:  # One transaction, commits on exit
+                conn = self._conn
+                conn.execute('BEGIN')
+                for data, alerts in batch:
+                    conn.execute('SAVEPOINT upload')
+                    try:
+                        self._insert_health_data(data)
+                        if alerts:
+                            self._insert_alerts(alerts)
+                    except Exception as e:
+                        conn.execute('ROLLBACK TO upload')
+                        logger.error("Skipped malformed upload: %s", e)
+                    else:
+                        stored += 1
+                    conn.execute('RELEASE upload')
+            return stored
             
         except Exception as e:
-            logger.error(f"Database storage error: {e}")
-            return False
+            logger.error("Database storage error (%d uploads): %s", len(batch), e)
+            return 0
     
-    def generate_alerts(self, data):
-        """Generate alerts based on health data"""
-        alerts = []
+    def _insert_health_data(self, data):
+        """Insert one upload (caller holds the lock and the transaction)"""
+        cursor = self._conn.cursor()
+        
+        # Parse timestamp (one clock read serves both the default and the uptime)
+        now = datetime.now()
+        timestamp = data['timestamp'] if 'timestamp' in data else now.isoformat()
+        system = data.get('system', _EMPTY)
+        
+        # Calculate uptime
+        uptime_start = system.get('uptime_start', 0)
+        if uptime_start > 0:
+            uptime_hours = (now.timestamp() - uptime_start) / 3600
+        else:
+            uptime_hours = 0
         
+        # Insert system status
+        cursor.execute(INSERT_SYSTEM_STATUS_SQL, (
+            timestamp,
+            uptime_hours,
+            system.get('total_events', 0),
+            system.get('total_reconnects', 0),
+            system.get('total_os_cleanups', 0),
+            system.get('upload_count', 0),
+            system.get('upload_failures', 0)
+        ))
+        
+        system_id = cursor.lastrowid
+        
+        # Insert IMU status (all rows in one executemany)
+        imus = data.get('imus', [])
+        rows = [_imu_row(system_id, timestamp, imu) for imu in imus]
+        
+        cursor.executemany(INSERT_IMU_STATUS_SQL, rows)
+    
+    def build_alerts(self, data):
+        """Build alerts from health data (no database access)"""
         try:
             imus = data.get('imus', [])
-            timestamp = data.get('timestamp', datetime.now().isoformat())
-            
-            for imu in imus:
-                imu_number = imu.get('number', 0)
-                imu_name = imu.get('name', 'Unknown')
-                device_health = imu.get('device_health', {})
-                
-                # Alert: Device not ready
-                if not imu.get('is_ready', False):
-                    alerts.append({
-                        'timestamp': timestamp,
-                        'imu_number': imu_number,
-                        'imu_name': imu_name,
-                        'alert_type': 'device_offline',
-                        'severity': 'high',
-                        'message': f"IMU-{imu_number} ({imu_name}) is not ready"
-                    })
-                
-                # Alert: High consecutive failures
-                consecutive_failures = device_health.get('consecutive_failures', 0)
-                if consecutive_failures >= 2:
-                    alerts.append({
-                        'timestamp': timestamp,
-                        'imu_number': imu_number,
-                        'imu_name': imu_name,
-                        'alert_type': 'high_failures',
-                        'severity': 'medium',
-                        'message': f"IMU-{imu_number} has {consecutive_failures} consecutive failures"
-                    })
-                
-                # Alert: Sliding window unhealthy
-                sliding_window = device_health.get('sliding_window', {})
-                window_stats = sliding_window.get('stats', {})
-                unhealthy_percentage = window_stats.get('unhealthy_percentage', 0.0)
-                
-                if unhealthy_percentage >= 50.0 and not sliding_window.get('healthy', True):
-                    alerts.append({
-                        'timestamp': timestamp,
-                        'imu_number': imu_number,
-                        'imu_name': imu_name,
-                        'alert_type': 'sliding_window_failure',
-                        'severity': 'medium',
-                        'message': f"IMU-{imu_number} sliding window: {unhealthy_percentage:.1f}% unhealthy"
-                    })
-                
-                # Alert: No data for extended period
-                time_since_last_data = device_health.get('time_since_last_data', 0)
-                if time_since_last_data > 10.0:
-                    alerts.append({
-                        'timestamp': timestamp,
-                        'imu_number': imu_number,
-                        'imu_name': imu_name,
-                        'alert_type': 'no_data',
-                        'severity': 'high',
-                        'message': f"IMU-{imu_number} no data for {time_since_last_data:.1f}s"
-                    })
-            
-            # Store alerts to database
-            if alerts:
-                self._store_alerts(alerts)
-            
-            return alerts
+            timestamp = data['timestamp'] if 'timestamp' in data else datetime.now().isoformat()
+            return [alert for imu in imus for alert in _alerts_for(imu, timestamp)]
             
         except Exception as e:
-            logger.error(f"Alert generation error: {e}")
+            logger.error("Alert generation error: %s", e)
             return []
     
-    def _store_alerts(self, alerts):
-        """Store alerts to database"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            for alert in alerts:
-                cursor.execute('''
-                    INSERT INTO alerts
-                    (timestamp, imu_number, imu_name, alert_type, severity, message)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (
-                    alert['timestamp'],
-                    alert['imu_number'],
-                    alert['imu_name'],
-                    alert['alert_type'],
-                    alert['severity'],
-                    alert['message']
-                ))
-            
-            conn.commit()
-            conn.close()
-            
-        except Exception as e:
-            logger.error(f"Alert storage error: {e}")
+    def _insert_alerts(self, alerts):
+        """Insert alerts (caller holds the lock and the transaction)"""
+        self._conn.executemany(INSERT_ALERT_SQL, alerts)
     
     def get_recent_status(self, limit=10):
         """Get recent system status"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT timestamp, uptime_hours, total_events, 
-                       total_reconnects, total_os_cleanups
-                FROM system_status
-                ORDER BY id DESC
-                LIMIT ?
-            ''', (limit,))
-            
-            rows = cursor.fetchall()
-            conn.close()
+            with self._lock:
+                cursor = self._conn.cursor()
+                cursor.execute('''
+                    SELECT timestamp, uptime_hours, total_events, 
+                           total_reconnects, total_os_cleanups
+                    FROM system_status
+                    ORDER BY id DESC
+                    LIMIT ?
+                ''', (limit,))
+                
+                rows = cursor.fetchall()
             
             return [
                 {
@@ -307,26 +401,24 @@ class HealthDataStore:
             ]
             
         except Exception as e:
-            logger.error(f"Query error: {e}")
+            logger.error("Query error: %s", e)
             return []
     
     def get_active_alerts(self):
         """Get unresolved alerts"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT timestamp, imu_number, imu_name, 
-                       alert_type, severity, message
-                FROM alerts
-                WHERE resolved = 0
-                ORDER BY id DESC
-                LIMIT 50
-            ''')
-            
-            rows = cursor.fetchall()
-            conn.close()
+            with self._lock:
+                cursor = self._conn.cursor()
+                cursor.execute('''
+                    SELECT timestamp, imu_number, imu_name, 
+                           alert_type, severity, message
+                    FROM alerts
+                    WHERE resolved = 0
+                    ORDER BY id DESC
+                    LIMIT 50
+                ''')
+                
+                rows = cursor.fetchall()
             
             return [
                 {
@@ -341,7 +433,7 @@ class HealthDataStore:
             ]
             
         except Exception as e:
-            logger.error(f"Query error: {e}")
+            logger.error("Query error: %s", e)
             return []
 
 
@@ -352,14 +444,97 @@ class HealthMonitoringServer:
         self.host = host
         self.port = port
         self.data_store = HealthDataStore()
+        # SQLite work runs here so handlers never block the event loop
+        self._db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='health-db')
         self.app = web.Application()
+        self.app.on_startup.append(self._on_startup)
+        self.app.on_cleanup.append(self._on_cleanup)
         self._setup_routes()
         
+        # Uploads are acked at once and persisted in batches by _writer_loop
+        self._write_queue = None
+        self._writer_task = None
+        
+        # Serialized query results, reused until the writer commits new data
+        self._query_cache = {}
+        self._cache_generation = 0
+        
         # Statistics
         self.total_requests = 0
         self.total_errors = 0
+        self.total_dropped = 0
         self.last_update_time = None
     
+    async def _run_db(self, func, *args):
+        """Run a blocking data store call on the DB worker thread"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._db_executor, func, *args)
+    
+    async def _on_startup(self, app):
+        """Start the background DB writer"""
+        self._write_queue = asyncio.Queue(maxsize=10000)
+        self._writer_task = asyncio.create_task(self._writer_loop())
+    
+    async def _on_cleanup(self, app):
+        """Write queued uploads, finish pending DB work and close the shared connection"""
+        if self._writer_task is not None:
+            # A dead writer never drains the queue, so don't wait on join() alone
+            if not self._writer_task.done():
+                join = asyncio.ensure_future(self._write_queue.join())
+                await asyncio.wait((join, self._writer_task), return_when=asyncio.FIRST_COMPLETED)
+                join.cancel()
+            self._writer_task.cancel()
+            try:
+                await self._writer_task
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                logger.error("DB writer failed: %s", e)
+        self._db_executor.shutdown(wait=True)
+        self.data_store.close()
+    
+    async def _cached_query(self, key, func, *args):
+        """Run a read query once per write generation; returns JSON bytes"""
+        body = self._query_cache.get(key)
+        if body is None:
+            generation = self._cache_generation
+            body = json_dumps(await self._run_db(func, *args))
+            # Don't cache a result that raced with a write commit
+            if generation == self._cache_generation:
+                if len(self._query_cache) >= 64:
+                    self._query_cache.clear()
+                self._query_cache[key] = body
+        return body
+    
+    def _invalidate_query_cache(self):
+        """Forget cached query results after the data changed"""
+        self._cache_generation += 1
+        self._query_cache.clear()
+    
+    def _enqueue_write(self, item):
+        """Queue an upload for the writer; on overflow drop the oldest"""
+        if self._write_queue.full():
+            self._write_queue.get_nowait()
+            self._write_queue.task_done()
+            self.total_dropped += 1
+            logger.warning("Write queue full, dropped oldest upload")
+        self._write_queue.put_nowait(item)
+    
+    async def _writer_loop(self):
+        """Drain the write queue in batches of up to 128 uploads per transaction"""
+        while True:
+            batch = [await self._write_queue.get()]
+            while len(batch) < 128 and not self._write_queue.empty():
+                batch.append(self._write_queue.get_nowait())
+            
+            try:
+                stored = await self._run_db(self.data_store.store_health_batch, batch)
+                self.total_errors += len(batch) - stored
+            finally:
+                self._invalidate_query_cache()
+                for _ in batch:
+                    self._write_queue.task_done()
+    
     def _setup_routes(self):
         """Setup HTTP routes"""
         self.app.router.add_post('/api/imu/status', self.handle_status)
@@ -375,10 +550,10 @@ class HealthMonitoringServer:
         try:
             # Parse JSON data with validation
             try:
-                data = await request.json()
+                data = json_loads(await request.read())
             except json.JSONDecodeError as e:
                 self.total_errors += 1
-                logger.error(f"Invalid JSON: {e}")
+                logger.error("Invalid JSON: %s", e)
                 return web.Response(status=400, text="Invalid JSON format")
             
             # Validate required fields
@@ -396,128 +571,102 @@ class HealthMonitoringServer:
             
             # Log receipt
             num_imus = len(data.get('imus', []))
-            logger.info(f"Received status from {num_imus} IMUs")
+            logger.info("Received status from %d IMUs", num_imus)
             
-            # Store to database
-            success = self.data_store.store_health_data(data)
-            
-            if not success:
-                self.total_errors += 1
-                return web.Response(status=500, text="Storage failed")
-            
-            # Generate alerts
-            alerts = self.data_store.generate_alerts(data)
+            # Generate alerts (in memory); storage happens in the background writer
+            alerts = self.data_store.build_alerts(data)
+            self._enqueue_write((data, alerts))
             
             # Log alerts
             for alert in alerts:
-                severity = alert['severity'].upper()
-                logger.warning(f"[{severity}] {alert['message']}")
+                logger.warning("[%s] %s", alert.severity.upper(), alert.message)
             
             # Update timestamp
             self.last_update_time = datetime.now()
             
-            # Print summary to console
-            self._print_status_summary(data, alerts)
+            # One summary record (console + log file)
+            self._log_status_summary(data, alerts)
             
-            return web.json_response({
-                'status': 'ok',
-                'alerts_generated': len(alerts)
-            })
+            return web.Response(
+                body=STATUS_OK_TEMPLATE % len(alerts),
+                content_type='application/json',
+                charset='utf-8'
+            )
             
         except Exception as e:
             self.total_errors += 1
-            logger.error(f"Status handling error: {e}")
+            logger.error("Status handling error: %s", e)
             return web.Response(status=500, text=str(e))
     
     async def handle_get_recent(self, request):
         """Get recent system status"""
         try:
             limit = int(request.query.get('limit', '10'))
-            recent = self.data_store.get_recent_status(limit)
-            return web.json_response(recent)
+            body = await self._cached_query(('recent', limit), self.data_store.get_recent_status, limit)
+            return json_body_response(body)
         except Exception as e:
-            logger.error(f"Recent status error: {e}")
+            logger.error("Recent status error: %s", e)
             return web.Response(status=500, text=str(e))
     
     async def handle_get_alerts(self, request):
         """Get active alerts"""
         try:
-            alerts = self.data_store.get_active_alerts()
-            return web.json_response(alerts)
+            body = await self._cached_query(('alerts',), self.data_store.get_active_alerts)
+            return json_body_response(body)
         except Exception as e:
-            logger.error(f"Alerts query error: {e}")
+            logger.error("Alerts query error: %s", e)
             return web.Response(status=500, text=str(e))
     
     async def handle_get_stats(self, request):
         """Get server statistics"""
-        return web.json_response({
+        return json_response({
             'total_requests': self.total_requests,
             'total_errors': self.total_errors,
+            'total_dropped': self.total_dropped,
             'error_rate': self.total_errors / max(self.total_requests, 1),
             'last_update': self.last_update_time.isoformat() if self.last_update_time else None
         })
     
     async def handle_index(self, request):
         """Simple status page"""
-        html = f"""
-        <html>
-        <head><title>IMU Health Monitor</title></head>
-        <body>
-            <h1>IMU Health Monitoring Server</h1>
-            <p>Status: Running</p>
-            <p>Total Requests: {self.total_requests}</p>
-            <p>Total Errors: {self.total_errors}</p>
-            <p>Last Update: {self.last_update_time or 'Never'}</p>
-            <h2>API Endpoints</h2>
-            <ul>
-                <li>POST /api/imu/status - Receive IMU health data</li>
-                <li>GET /api/system/recent?limit=10 - Recent system status</li>
-                <li>GET /api/alerts/active - Active alerts</li>
-                <li>GET /api/stats - Server statistics</li>
-            </ul>
-        </body>
-        </html>
-        """
+        html = INDEX_HTML.format(
+            total_requests=self.total_requests,
+            total_errors=self.total_errors,
+            last_update=escape(str(self.last_update_time or 'Never'))
+        )
         return web.Response(text=html, content_type='text/html')
     
-    def _print_status_summary(self, data, alerts):
-        """Print status summary to console"""
-        print("\n" + "=" * 60)
-        print("RECEIVED STATUS UPDATE")
-        print("=" * 60)
+    def _log_status_summary(self, data, alerts):
+        """Log one summary record per upload (alerts are logged individually above)"""
+        if not logger.isEnabledFor(logging.INFO):
+            return
         
         system = data.get('system', {})
-        print(f"Events: {system.get('total_events', 0)} | "
-              f"Reconnects: {system.get('total_reconnects', 0)} | "
-              f"OS Cleanups: {system.get('total_os_cleanups', 0)}")
-        
-        imus = data.get('imus', [])
-        print(f"\nIMUs: {len(imus)}")
         
-        for imu in imus:
+        imu_parts = []
+        for imu in data.get('imus', []):
             status = "READY" if imu.get('is_ready', False) else "OFFLINE"
             device_health = imu.get('device_health', {})
             window = device_health.get('sliding_window', {})
-            window_stats = window.get('stats', {})
             
-            health_info = ""
+            part = f"IMU-{imu.get('number', 0)}:{status}"
             if not window.get('healthy', True):
-                pct = window_stats.get('unhealthy_percentage', 0)
-                health_info = f" [Window: {pct:.0f}% unhealthy]"
+                pct = window.get('stats', {}).get('unhealthy_percentage', 0)
+                part += f" window={pct:.0f}%"
             
             failures = device_health.get('consecutive_failures', 0)
             if failures > 0:
-                health_info += f" [Failures: {failures}]"
-            
-            print(f"  IMU-{imu.get('number', 0)}: {status}{health_info}")
-        
-        if alerts:
-            print(f"\nAlerts: {len(alerts)}")
-            for alert in alerts:
-                severity_symbol = "!" if alert['severity'] == 'high' else "*"
-                print(f"  {severity_symbol} {alert['message']}")
+                part += f" failures={failures}"
+            imu_parts.append(part)
         
-        print("=" * 60 + "\n")
+        logger.info(
+            "Status update: events=%s reconnects=%s os_cleanups=%s | %s | alerts=%d",
+            system.get('total_events', 0),
+            system.get('total_reconnects', 0),
+            system.get('total_os_cleanups', 0),
+            ", ".join(imu_parts) or "no IMUs",
+            len(alerts)
+        )
     
     def run(self):
         """Start the server"""
@@ -529,7 +678,13 @@ class HealthMonitoringServer:
         print("=" * 60)
         print("\nWaiting for health data...\n")
         
-        web.run_app(self.app, host=self.host, port=self.port, print=lambda x: None)
+        # Explicit uvloop loop when available (no global policy change)
+        loop = uvloop.new_event_loop() if uvloop is not None else None
+        
+        # No per-request access log: every upload already logs its own summary,
+        # and /api/stats carries the request/error counters
+        web.run_app(self.app, host=self.host, port=self.port,
+                    print=lambda x: None, access_log=None, loop=loop)
 
 
 def main():
@@ -4,14 +4,27 @@ Witmotion BLE Device Model - Production Stable Version with Sliding Window
 Strict adherence to BlueZ constraints: serial connection, explicit resource management, complete error handling
 """
 import asyncio
+import bisect
+import struct
 import time
 import logging
 from enum import Enum
+from operator import mul
 from collections import deque
 import bleak
 
 logger = logging.getLogger(__name__)
 
+# Data frame: 0x55 0x61 header + 18-byte payload
+FRAME_HEADER = b'\x55\x61'
+# Data frame payload: 9 little-endian int16 (acc xyz, gyro xyz, angle xyz)
+_FRAME_PAYLOAD = struct.Struct('<9h')
+# Full-scale ranges: ±16 g, ±2000 °/s, ±180 °
+_FRAME_SCALES = (16 / 32768,) * 3 + (2000 / 32768,) * 3 + (180 / 32768,) * 3
+# Field names of a parsed frame, in payload order (DeviceModel.frame)
+FRAME_FIELDS = ("AccX", "AccY", "AccZ", "AsX", "AsY", "AsZ", "AngX", "AngY", "AngZ")
+_FRAME_DECIMALS = (3,) * len(FRAME_FIELDS)  # Rounding for reported values
+
 
 class DeviceState(Enum):
     """Device state machine"""
@@ -23,6 +36,10 @@ class DeviceState(Enum):
     ERROR = "error"
 
 
+# States in which the BLE link is up (hashed membership, no per-call list)
+_CONNECTED_STATES = frozenset((DeviceState.CONNECTED, DeviceState.DISCOVERING, DeviceState.READY))
+
+
 class DeviceModel:
     """IMU device model with complete state machine and resource management"""
     
@@ -31,6 +48,20 @@ class DeviceModel:
     READ_CHARACTERISTIC_UUID = "0000ffe4-0000-1000-8000-00805f9a34fb"
     WRITE_CHARACTERISTIC_UUID = "0000ffe9-0000-1000-8000-00805f9a34fb"
     
+    # Frequency mapping (Hz -> rate register value), keys sorted for bisect
+    freqMap = {
+        0.1: 0x0001, 0.5: 0x0002, 1: 0x0003, 2: 0x0004,
+        5: 0x0005, 10: 0x0006, 20: 0x0007, 50: 0x0008,
+        100: 0x0009, 200: 0x000B,
+    }
+    _FREQ_KEYS = sorted(freqMap)
+    
+    # Fixed register write commands (0xFF 0xAA reg value_lo value_hi), built once
+    _UNLOCK_CMD = bytes((0xff, 0xaa, 0x69, 0x88, 0xb5))
+    _SAVE_CMD = bytes((0xff, 0xaa, 0x00, 0x00, 0x00))
+    _ACC_CAL_CMD = bytes((0xff, 0xaa, 0x01, 0x01, 0x00))
+    _FREQ_CMDS = {f: bytes((0xff, 0xaa, 0x03, v & 0xff, v >> 8)) for f, v in freqMap.items()}
+    
     def __init__(self, device_name, mac, callback_method, config):
         self.deviceName = device_name
         self.mac = mac
@@ -50,13 +81,18 @@ class DeviceModel:
         self.notify_characteristic = None
         
         # Raw data queue (decoupled BLE callback)
-        self.raw_data_queue = asyncio.Queue(maxsize=100)
+        # Bounded deque drops the oldest notification itself; the event wakes the consumer
+        self.raw_data_queue = deque(maxlen=512)
+        self.drop_count = 0  # Notifications dropped on overflow since the last connect
+        self._data_event = asyncio.Event()
+        self._loop = None
         
         # Data reception
-        self.deviceData = {}
-        self.TempBytes = []
+        self.frame = None  # Latest parsed frame, FRAME_FIELDS order
+        self.TempBytes = bytearray()  # Frame assembly buffer
         self.first_data_received = False
-        self.last_data_time = 0
+        self._first_data_event = asyncio.Event()  # Set with first_data_received
+        self.last_data_time = 0  # time.monotonic() of the last parsed frame
         
         # Health monitoring with sliding window
         health_config = config.get('health_monitoring', {})
@@ -65,18 +101,11 @@ class DeviceModel:
         
         # NEW: Sliding window for health detection
         window_size = health_config.get('sliding_window_size', 50)
-        self.health_window = deque(maxlen=window_size)
+        self.health_window = deque(maxlen=window_size)  # (timestamp, healthy) tuples
+        self._window_unhealthy = 0  # Unhealthy entries currently in health_window
         self.trigger_percentage = health_config.get('trigger_percentage', 70.0)
         
-        # Frequency mapping
-        self.freqMap = {
-            0.1: 0x0001, 0.5: 0x0002, 1: 0x0003, 2: 0x0004,
-            5: 0x0005, 10: 0x0006, 20: 0x0007, 50: 0x0008,
-            100: 0x0009, 200: 0x000B,
-        }
-        
         logger.info(f"[{self.deviceName}] Initialized (MAC: {self.mac})")
-        print(f"[{self.deviceName}] Initialized (MAC: {self.mac})")
     
     async def connect(self):
         """
@@ -93,7 +122,8 @@ class DeviceModel:
             return False, f"Invalid state: {self.state}"
         
         self.state = DeviceState.CONNECTING
-        print(f"[{self.deviceName}] Connecting to {self.mac}...")
+        logger.info(f"[{self.deviceName}] Connecting to {self.mac}...")
+        self._loop = asyncio.get_running_loop()  # For waking the consumer from the BLE callback
         
         try:
             # Step 1: Create client
@@ -117,7 +147,7 @@ class DeviceModel:
                 return False, "Connection failed"
             
             self.state = DeviceState.CONNECTED
-            print(f"[{self.deviceName}] Connected, discovering services...")
+            logger.info(f"[{self.deviceName}] Connected, discovering services...")
             
             # Step 3: Discover services and characteristics (with timeout)
             self.state = DeviceState.DISCOVERING
@@ -140,14 +170,14 @@ class DeviceModel:
                     timeout=5.0
                 )
             except asyncio.TimeoutError:
-                print(f"[{self.deviceName}] Warning: freq setup timeout (non-fatal)")
+                logger.warning(f"[{self.deviceName}] Freq setup timeout (non-fatal)")
             except Exception as e:
-                print(f"[{self.deviceName}] Warning: freq setup error: {e}")
+                logger.warning(f"[{self.deviceName}] Freq setup error: {e}")
             
             # Step 5: Start notification
             try:
                 await self.client.start_notify(
-                    self.notify_characteristic.uuid,
+                    self.notify_characteristic,
                     self._on_data_received
                 )
             except Exception as e:
@@ -156,24 +186,24 @@ class DeviceModel:
             
             # Step 6: Wait for first data (verify connection actually works)
             self.first_data_received = False
+            self._first_data_event.clear()
             logger.info(f"[{self.deviceName}] Waiting for first data...")
-            print(f"[{self.deviceName}] Waiting for first data...")
             
             # Start data processing task
             self.data_task = asyncio.create_task(self.process_data_queue())
             
-            start_time = time.time()
-            while not self.first_data_received:
-                if time.time() - start_time > self.FIRST_DATA_TIMEOUT:
-                    await self._cleanup()
-                    return False, "No data received (timeout)"
-                await asyncio.sleep(0.1)
+            # Wake as soon as the first frame is parsed (no polling tick)
+            try:
+                await asyncio.wait_for(self._first_data_event.wait(), self.FIRST_DATA_TIMEOUT)
+            except asyncio.TimeoutError:
+                await self._cleanup()
+                return False, "No data received (timeout)"
             
             self.state = DeviceState.READY
             self.consecutive_failures = 0
-            self.health_window.clear()  # Clear old health data on reconnection
+            self._reset_health_window()  # Clear old health data on reconnection
+            self.drop_count = 0
             logger.info(f"[{self.deviceName}] READY (data flowing)")
-            print(f"[{self.deviceName}] READY (data flowing)")
             return True, "Connected successfully"
             
         except Exception as e:
@@ -198,14 +228,14 @@ class DeviceModel:
                     break
             
             if not self.notify_characteristic or not self.writer_characteristic:
-                print(f"[{self.deviceName}] Required characteristics not found")
+                logger.error(f"[{self.deviceName}] Required characteristics not found")
                 return False
             
-            print(f"[{self.deviceName}] Services discovered")
+            logger.info(f"[{self.deviceName}] Services discovered")
             return True
             
         except Exception as e:
-            print(f"[{self.deviceName}] Service discovery error: {e}")
+            logger.error(f"[{self.deviceName}] Service discovery error: {e}")
             return False
     
     async def disconnect(self):
@@ -215,9 +245,9 @@ class DeviceModel:
         2. Disconnect
         3. Clean up all resources
         """
-        print(f"[{self.deviceName}] Disconnecting...")
+        logger.info(f"[{self.deviceName}] Disconnecting...")
         await self._cleanup()
-        print(f"[{self.deviceName}] Disconnected")
+        logger.info(f"[{self.deviceName}] Disconnected")
     
     async def _cleanup(self):
         """Resource cleanup (idempotent, can be called multiple times)"""
@@ -235,7 +265,7 @@ class DeviceModel:
         if self.client and self.client.is_connected and self.notify_characteristic:
             try:
                 await asyncio.wait_for(
-                    self.client.stop_notify(self.notify_characteristic.uuid),
+                    self.client.stop_notify(self.notify_characteristic),
                     timeout=2.0
                 )
                 logger.info(f"[{self.deviceName}] Notification stopped")
@@ -259,18 +289,17 @@ class DeviceModel:
         self.notify_characteristic = None
         
         # Clear data queue
-        while not self.raw_data_queue.empty():
-            try:
-                self.raw_data_queue.get_nowait()
-            except:
-                break
+        self.raw_data_queue.clear()
+        self._data_event.clear()
+        del self.TempBytes[:]  # Partial frame from the old link; buffer object is reused
         
         # State machine constraint: only allow one-way migration to DISCONNECTED
-        if old_state in [DeviceState.CONNECTED, DeviceState.DISCOVERING, DeviceState.READY]:
+        if old_state in _CONNECTED_STATES:
             self.state = DeviceState.DISCONNECTED
             logger.info(f"[{self.deviceName}] State: {old_state.value} -> DISCONNECTED")
         
         self.first_data_received = False
+        self._first_data_event.clear()
     
     def _on_data_received(self, sender, data):
         """
@@ -279,48 +308,34 @@ class DeviceModel:
         Prohibit business logic here to prevent blocking BLE stack
         """
         try:
-            # Only cache raw bytes, return immediately
-            raw_bytes = bytes.fromhex(data.hex())
+            # Only cache raw bytes, return immediately (bytearray is copied:
+            # bleak may reuse the buffer; immutable bytes are queued as-is)
+            raw_bytes = data if type(data) is bytes else bytes(data)
             
-            # Non-blocking put to queue
-            try:
-                self.raw_data_queue.put_nowait((time.time(), raw_bytes))
-            except asyncio.QueueFull:
-                # Queue full, drop oldest data (don't block)
-                logger.warning(f"[{self.deviceName}] Data queue full, dropping old data")
-                try:
-                    self.raw_data_queue.get_nowait()
-                    self.raw_data_queue.put_nowait((time.time(), raw_bytes))
-                except:
-                    pass
+            # Non-blocking put to queue (a full deque drops its oldest entry)
+            raw_queue = self.raw_data_queue
+            if len(raw_queue) == raw_queue.maxlen:
+                self.drop_count += 1
+                if self.drop_count % 100 == 1:  # First drop, then every 100th
+                    logger.warning(f"[{self.deviceName}] Data queue full, dropping old data "
+                                   f"({self.drop_count} dropped)")
+            raw_queue.append((time.monotonic(), raw_bytes))
+            
+            # Wake the consumer; skip when a wakeup is already set
+            # (the consumer clears the event before draining, so nothing is missed)
+            if not self._data_event.is_set():
+                self._loop.call_soon_threadsafe(self._data_event.set)
                     
         except Exception as e:
             logger.error(f"[{self.deviceName}] BLE callback error: {e}")
     
-    def _process_data(self, bytes_data):
-        """Parse IMU data"""
+    def _process_data(self, bytes_data, offset=0):
+        """Parse IMU data (18-byte payload at offset)"""
         try:
-            Ax = self._get_sign_int16(bytes_data[1] << 8 | bytes_data[0]) / 32768 * 16
-            Ay = self._get_sign_int16(bytes_data[3] << 8 | bytes_data[2]) / 32768 * 16
-            Az = self._get_sign_int16(bytes_data[5] << 8 | bytes_data[4]) / 32768 * 16
-            Gx = self._get_sign_int16(bytes_data[7] << 8 | bytes_data[6]) / 32768 * 2000
-            Gy = self._get_sign_int16(bytes_data[9] << 8 | bytes_data[8]) / 32768 * 2000
-            Gz = self._get_sign_int16(bytes_data[11] << 8 | bytes_data[10]) / 32768 * 2000
-            AngX = self._get_sign_int16(bytes_data[13] << 8 | bytes_data[12]) / 32768 * 180
-            AngY = self._get_sign_int16(bytes_data[15] << 8 | bytes_data[14]) / 32768 * 180
-            AngZ = self._get_sign_int16(bytes_data[17] << 8 | bytes_data[16]) / 32768 * 180
-            
-            self.deviceData = {
-                "AccX": round(Ax, 3),
-                "AccY": round(Ay, 3),
-                "AccZ": round(Az, 3),
-                "AsX": round(Gx, 3),
-                "AsY": round(Gy, 3),
-                "AsZ": round(Gz, 3),
-                "AngX": round(AngX, 3),
-                "AngY": round(AngY, 3),
-                "AngZ": round(AngZ, 3)
-            }
+            # One C-level unpack of the signed int16 fields, then scale
+            # (scales are exact binary fractions, same values as v / 32768 * range).
+            # Full precision here; consumers round when they output values
+            self.frame = tuple(map(mul, _FRAME_PAYLOAD.unpack_from(bytes_data, offset), _FRAME_SCALES))
             
             # Callback to upper layer
             if self.callback_method:
@@ -334,50 +349,57 @@ class DeviceModel:
         Asynchronous data processing task (runs in asyncio loop)
         Fetch raw data from queue, perform parsing and business processing
         """
+        raw_queue = self.raw_data_queue
+        data_ready = self._data_event
         while self.state != DeviceState.DISCONNECTED:
             try:
-                # Wait for data with timeout
-                timestamp, raw_bytes = await asyncio.wait_for(
-                    self.raw_data_queue.get(),
-                    timeout=0.1
-                )
+                # Block until data arrives (_cleanup cancels this task on disconnect)
+                await data_ready.wait()
+                data_ready.clear()
                 
-                # Process data packet (protocol parsing)
-                for byte_val in raw_bytes:
-                    self.TempBytes.append(byte_val)
-                    
-                    # Check packet header
-                    if len(self.TempBytes) == 2:
-                        if self.TempBytes[0] != 0x55 or self.TempBytes[1] != 0x61:
-                            del self.TempBytes[0]
-                            continue
-                    
-                    # Complete packet (20 bytes)
-                    if len(self.TempBytes) == 20:
-                        self._process_data(self.TempBytes[2:])
-                        self.TempBytes.clear()
-                        
-                        # Mark first frame
-                        if not self.first_data_received:
-                            self.first_data_received = True
-                            logger.info(f"[{self.deviceName}] First data received")
-                        
-                        # Update health status
-                        self.last_data_time = timestamp
-                        
-            except asyncio.TimeoutError:
-                # Timeout is normal, continue loop
-                continue
+                # Drain everything queued since the last wakeup
+                while raw_queue:
+                    timestamp, raw_bytes = raw_queue.popleft()
+                    self._feed(timestamp, raw_bytes)
+            
             except Exception as e:
                 logger.error(f"[{self.deviceName}] Data queue processing error: {e}")
                 await asyncio.sleep(0.1)
     
-    @staticmethod
-    def _get_sign_int16(num):
-        """Convert to signed int16"""
-        if num >= pow(2, 15):
-            num -= pow(2, 16)
-        return num
+    def _feed(self, timestamp, raw_bytes):
+        """Append one notification to the frame buffer and parse complete frames"""
+        # Process data packet (protocol parsing): extend once, then scan for the
+        # 0x55 0x61 header and parse 20-byte frames in place (no per-frame slice)
+        buf = self.TempBytes
+        buf += raw_bytes
+        end = len(buf)
+        pos = 0
+        while True:
+            idx = buf.find(FRAME_HEADER, pos)
+            if idx < 0:
+                # No header yet; the last byte may be the start of one
+                pos = max(pos, end - 1)
+                break
+            pos = idx
+            
+            # Complete packet (20 bytes)
+            if end - pos < 20:
+                break
+            self._process_data(buf, pos + 2)
+            pos += 20
+            
+            # Mark first frame
+            if not self.first_data_received:
+                self.first_data_received = True
+                self._first_data_event.set()
+                logger.info(f"[{self.deviceName}] First data received")
+            
+            # Update health status
+            self.last_data_time = timestamp
+        
+        # Drop consumed bytes once per notification
+        if pos:
+            del buf[:pos]
     
     async def _send_data(self, data):
         """Send data to device"""
@@ -386,8 +408,8 @@ class DeviceModel:
         
         try:
             await self.client.write_gatt_char(
-                self.writer_characteristic.uuid,
-                bytearray(data),
+                self.writer_characteristic,
+                data,
                 response=False
             )
         except Exception as e:
@@ -395,12 +417,14 @@ class DeviceModel:
     
     async def setOutputFreq(self, freq=50):
         """Set output frequency"""
-        closest_freq = max((f for f in self.freqMap if f <= freq), default=50)
+        # Highest supported rate not above the request (50 Hz if none)
+        i = bisect.bisect_right(self._FREQ_KEYS, freq) - 1
+        closest_freq = self._FREQ_KEYS[i] if i >= 0 else 50
         
         await self._unlock()
         await asyncio.sleep(0.1)
         
-        await self._send_data(self._get_write_bytes(0x03, self.freqMap[closest_freq]))
+        await self._send_data(self._FREQ_CMDS[closest_freq])
         await asyncio.sleep(0.1)
         
         await self._save()
@@ -410,30 +434,33 @@ class DeviceModel:
         await self._unlock()
         await asyncio.sleep(0.1)
         
-        await self._send_data(self._get_write_bytes(0x01, 0x0001))
+        await self._send_data(self._ACC_CAL_CMD)
         await asyncio.sleep(0.1)
         
         await self._save()
     
     async def _unlock(self):
         """Unlock device"""
-        cmd = self._get_write_bytes(0x69, 0xb588)
-        await self._send_data(cmd)
+        await self._send_data(self._UNLOCK_CMD)
     
     async def _save(self):
         """Save settings"""
-        cmd = self._get_write_bytes(0x00, 0x0000)
-        await self._send_data(cmd)
+        await self._send_data(self._SAVE_CMD)
     
     @staticmethod
     def _get_write_bytes(reg_addr, value):
         """Construct write command"""
-        return [0xff, 0xaa, reg_addr, value & 0xff, value >> 8]
+        return bytes((0xff, 0xaa, reg_addr, value & 0xff, value >> 8))
     
     @staticmethod
     def _get_read_bytes(reg_addr):
         """Construct read command"""
-        return [0xff, 0xaa, 0x27, reg_addr, 0]
+        return bytes((0xff, 0xaa, 0x27, reg_addr, 0))
+    
+    @property
+    def deviceData(self):
+        """Latest frame as a field-name dict (built on demand, not per frame)"""
+        return dict(zip(FRAME_FIELDS, self.frame)) if self.frame else {}
     
     def is_ready(self):
         """Check if device is ready"""
@@ -441,7 +468,7 @@ class DeviceModel:
     
     def is_connected(self):
         """Check if connected"""
-        return self.state in [DeviceState.CONNECTED, DeviceState.DISCOVERING, DeviceState.READY]
+        return self.state in _CONNECTED_STATES
     
     def get_state(self):
         """Get current state"""
@@ -454,11 +481,27 @@ class DeviceModel:
         Args:
             is_healthy: bool indicating if current check passed
         """
-        current_time = time.time()
-        self.health_window.append({
-            'timestamp': current_time,
-            'healthy': is_healthy
-        })
+        window = self.health_window
+        if not window.maxlen:
+            return  # sliding_window_size 0: the window stays empty
+        current_time = time.monotonic()
+        
+        # Evict checks older than 1 second from the front (window is in append order)
+        while window and current_time - window[0][0] > 1.0:
+            if not window.popleft()[1]:
+                self._window_unhealthy -= 1
+        
+        # Keep the unhealthy count in step with what the deque evicts
+        if len(window) == window.maxlen and not window[0][1]:
+            self._window_unhealthy -= 1
+        window.append((current_time, is_healthy))
+        if not is_healthy:
+            self._window_unhealthy += 1
+    
+    def _reset_health_window(self):
+        """Empty the sliding window and its running counters"""
+        self.health_window.clear()
+        self._window_unhealthy = 0
     
     def check_sliding_window_health(self):
         """
@@ -466,22 +509,25 @@ class DeviceModel:
         
         Returns: (is_healthy: bool, reason: str, stats: dict)
         """
-        if len(self.health_window) == 0:
+        if not self.health_window:
             return True, "No data in window", {}
         
-        # Filter checks from last 1 second
-        current_time = time.time()
-        recent_checks = [
-            check for check in self.health_window
-            if current_time - check['timestamp'] <= 1.0
-        ]
+        # Eviction happens on append; skip (without removing) any front entries
+        # that went stale since the last check was recorded
+        current_time = time.monotonic()
+        total_count = len(self.health_window)
+        unhealthy_count = self._window_unhealthy
+        for timestamp, healthy in self.health_window:
+            if current_time - timestamp <= 1.0:
+                break
+            total_count -= 1
+            if not healthy:
+                unhealthy_count -= 1
         
-        if len(recent_checks) == 0:
+        if total_count == 0:
             return True, "No recent checks", {}
         
         # Calculate percentage of unhealthy checks
-        unhealthy_count = sum(1 for check in recent_checks if not check['healthy'])
-        total_count = len(recent_checks)
         unhealthy_percentage = (unhealthy_count / total_count) * 100
         
         stats = {
@@ -508,7 +554,7 @@ class DeviceModel:
         
         Returns: (is_healthy: bool, reason: str)
         """
-        current_time = time.time()
+        current_time = time.monotonic()
         
         # Not in READY state, don't check
         if self.state != DeviceState.READY:
@@ -529,6 +575,16 @@ class DeviceModel:
         
         return True, "Healthy"
     
+    def get_health_snapshot(self, data_timeout=3.0):
+        """
+        Basic + sliding window health in one call (status display)
+        
+        Returns: (is_healthy: bool, window_healthy: bool, window_stats: dict)
+        """
+        is_healthy, _ = self.check_health(data_timeout)
+        window_healthy, _, window_stats = self.check_sliding_window_health()
+        return is_healthy, window_healthy, window_stats
+    
     def increment_failure(self):
         """Increment failure count"""
         self.consecutive_failures += 1
@@ -549,7 +605,7 @@ class DeviceModel:
         
         Returns: dict with health metrics
         """
-        current_time = time.time()
+        current_time = time.monotonic()
         
         # Get sliding window statistics
         window_healthy, window_reason, window_stats = self.check_sliding_window_health()
@@ -562,9 +618,10 @@ class DeviceModel:
             'mac': self.mac,
             'state': self.state.value,
             'is_ready': self.is_ready(),
-            'last_data_time': self.last_data_time,
+            'last_data_time': self.last_data_time,  # Monotonic clock, only meaningful as a difference
             'time_since_last_data': current_time - self.last_data_time if self.last_data_time > 0 else -1,
             'consecutive_failures': self.consecutive_failures,
+            'dropped_since_reset': self.drop_count,
             'basic_health': {
                 'healthy': basic_healthy,
                 'reason': basic_reason
@@ -574,5 +631,7 @@ class DeviceModel:
                 'reason': window_reason,
                 'stats': window_stats
             },
-            'current_data': self.deviceData.copy() if self.deviceData else {}
+            # One rounded dict straight from the frame tuple (no intermediate deviceData dict)
+            'current_data': (dict(zip(FRAME_FIELDS, map(round, self.frame, _FRAME_DECIMALS)))
+                             if self.frame else {})
         }